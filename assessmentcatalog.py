@@ -0,0 +1,113 @@
+import threading
+import time
+
+# --- 평가 문항 카탈로그 ---
+# 평가 문항 시트를 한 번만 내려받아 settingname으로 색인하고, 모든 세션이 공유한다.
+# 이후에는 시트 끝에 새로 추가된 행만 읽어서 색인을 갱신한다.
+# (이미 있는 행을 시트에서 직접 고친 경우를 위해 full_refresh_interval마다 전체를 다시 읽음)
+# 교사가 새 평가 코드를 만들 때는 reserve로 코드를 먼저 잡아 두고, register로 시트에 저장한다.
+# 확인과 저장을 같은 잠금 안에서 하므로 두 교사가 동시에 같은 코드를 저장할 수 없다.
+class AssessmentCatalog:
+    def __init__(self, open_sheet, refresh_interval=60, miss_interval=5,
+                 full_refresh_interval=600, reservation_ttl=3600):
+        self._open_sheet = open_sheet
+        self._sheet = None
+        self._lock = threading.Lock()
+        self._header = []
+        self._index = {}
+        self._reservations = {}     # settingname -> (owner, 만료 시각)
+        self._rows_loaded = 0
+        self._refreshed_at = 0.0
+        self._full_refreshed_at = 0.0
+        self.refresh_interval = refresh_interval
+        self.miss_interval = miss_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.reservation_ttl = reservation_ttl
+
+    def _worksheet(self):
+        if self._sheet is None:
+            self._sheet = self._open_sheet()
+        return self._sheet
+
+    def _add_rows(self, rows, index):
+        for row in rows:
+            row = list(row) + [""] * (len(self._header) - len(row))
+            record = dict(zip(self._header, row))
+            if record.get("settingname"):
+                index[record["settingname"]] = record
+        self._rows_loaded += len(rows)
+
+    # settingname을 주면 잠금을 얻은 뒤 다시 확인해서, 기다리는 동안 다른 세션이 이미 갱신했으면 읽지 않음
+    # (한 반이 한꺼번에 들어와도 시트를 한 번만 읽음)
+    def refresh(self, settingname=None):
+        with self._lock:
+            if settingname is None or self._stale(settingname):
+                self._refresh()
+
+    def _stale(self, settingname):
+        age = time.monotonic() - self._refreshed_at
+        if not self._header or age > self.refresh_interval:
+            return True
+        # 방금 등록된 평가일 수 있으므로 새 행을 확인
+        return settingname not in self._index and age > self.miss_interval
+
+    def _refresh(self):
+        sheet = self._worksheet()
+        now = time.monotonic()
+        if not self._header or now - self._full_refreshed_at > self.full_refresh_interval:
+            # get()은 잠그지 않고 읽으므로 새 색인을 다 만든 뒤 한 번에 바꿔 끼움
+            values = sheet.get_all_values()
+            index = {}
+            self._rows_loaded = 0
+            if values:
+                self._header = values[0]
+                self._add_rows(values[1:], index)
+            self._index = index
+            self._full_refreshed_at = now
+        else:
+            # 마지막으로 읽은 행 다음부터만 가져오기 (1행은 헤더)
+            self._add_rows(sheet.get_values(f"A{self._rows_loaded + 2}:ZZ"), self._index)
+        self._refreshed_at = now
+
+    def get(self, settingname):
+        if self._stale(settingname):
+            self.refresh(settingname)
+
+        record = self._index.get(settingname)
+        return dict(record) if record else None
+
+    def _reserved_by_other(self, settingname, owner):
+        reservation = self._reservations.get(settingname)
+        if reservation and reservation[1] <= time.monotonic():
+            del self._reservations[settingname]
+            return False
+        return bool(reservation) and reservation[0] != owner
+
+    # 코드를 owner 몫으로 잡아 둠. 이미 쓰고 있거나 다른 교사가 잡아 둔 코드면 False
+    # owner가 전에 잡아 둔 다른 코드는 풀어 줌
+    def reserve(self, settingname, owner):
+        with self._lock:
+            self._refresh()
+            if settingname in self._index or self._reserved_by_other(settingname, owner):
+                return False
+            # 같은 교사가 다시 등록하면 만료 시각만 늘어남
+            self._release(owner)
+            self._reservations[settingname] = (owner, time.monotonic() + self.reservation_ttl)
+            return True
+
+    def _release(self, owner):
+        for name, (holder, _) in list(self._reservations.items()):
+            if holder == owner:
+                del self._reservations[name]
+
+    # 평가 행을 시트 끝에 저장. 그 사이 다른 교사가 같은 코드를 저장했거나 잡아 두었으면 저장하지 않고 False
+    def register(self, settingname, owner, row):
+        with self._lock:
+            self._refresh()
+            if settingname in self._index or self._reserved_by_other(settingname, owner):
+                return False
+            self._worksheet().append_row(row)
+            # 다음 갱신에서 이 행을 다시 읽더라도 같은 내용으로 덮어쓸 뿐이므로 읽은 행 수는 그대로 둠
+            self._index[settingname] = dict(zip(self._header, list(row) + [""] * (len(self._header) - len(row))))
+            self._reservations.pop(settingname, None)
+            return True
@@ -0,0 +1,92 @@
+import time
+from tracing import current_span, span
+
+# run이 이 상태가 되면 더 기다려도 완료되지 않음
+FAILED_STATUSES = ("failed", "expired", "cancelled", "incomplete", "requires_action")
+
+class RunFailedError(Exception):
+    def __init__(self, run, message=None):
+        self.run = run
+        if message is None:
+            message = run.last_error.message if run.last_error else run.status
+        super().__init__(f"run {run.id}: {message}")
+
+def cancel_run(client, thread_id, run_id):
+    try:
+        client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+    except Exception:
+        pass
+
+# --- 폴링 방식: 처음에는 짧게, 점점 간격을 늘려가며 확인 ---
+def wait_for_run(client, thread_id, run_id, timeout=180, first_delay=0.5, max_delay=4.0):
+    deadline = time.monotonic() + timeout
+    delay = first_delay
+    while True:
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+        current_span().add("polls")
+        if run.status == "completed":
+            return run
+        if run.status in FAILED_STATUSES:
+            raise RunFailedError(run)
+        if time.monotonic() + delay > deadline:
+            cancel_run(client, thread_id, run_id)
+            raise RunFailedError(run, f"{timeout}초 안에 완료되지 않았습니다.")
+        time.sleep(delay)
+        delay = min(max_delay, delay * 1.5)
+
+# --- 스트리밍 방식: 폴링 없이 생성되는 글자를 바로 받음 ---
+# on_text에는 새로 생성된 글자 조각이 전달되고, 완료된 run과 전체 답변, 답변 메시지 id를 반환
+def stream_run(client, thread_id, assistant_id, on_text=None, timeout=180, **kwargs):
+    deadline = time.monotonic() + timeout
+    started = time.monotonic()
+    first_token = True
+    run_span = current_span()   # with 문 안에서는 stream 요청의 span이 현재 span이 됨
+    with client.beta.threads.runs.stream(
+            thread_id=thread_id, assistant_id=assistant_id, timeout=timeout, **kwargs) as stream:
+        for delta in stream.text_deltas:
+            if first_token:
+                run_span.set(first_token=round(time.monotonic() - started, 3))
+                first_token = False
+            if on_text:
+                on_text(delta)
+            if time.monotonic() > deadline:
+                run = stream.current_run
+                if run:
+                    cancel_run(client, thread_id, run.id)
+                    raise RunFailedError(run, f"{timeout}초 안에 완료되지 않았습니다.")
+                raise TimeoutError(f"{timeout}초 안에 완료되지 않았습니다.")
+        run = stream.get_final_run()
+        if run.status != "completed":
+            raise RunFailedError(run)
+        messages = stream.get_final_messages()
+
+    return run, messages[-1].content[0].text.value.strip(), messages[-1].id
+
+# --- run이 만든 답변 메시지만 가져오기 ---
+# 스레드 전체 목록을 받지 않고 run_id로 좁혀 최신 메시지 1개만 요청한다.
+# cursor(이전에 읽은 마지막 메시지 id)를 주면 그보다 새로운 메시지만 대상으로 한다.
+def get_run_message(client, thread_id, run_id, cursor=None):
+    params = {"run_id": run_id, "limit": 1, "order": "desc"}
+    if cursor:
+        params["before"] = cursor
+    msg = client.beta.threads.messages.list(thread_id, **params)
+    if not msg.data:
+        raise RuntimeError(f"run {run_id}의 답변 메시지를 찾을 수 없습니다.")
+    return msg.data[0]
+
+# --- 두 방식을 설정에 따라 선택 (스트리밍이 막힌 환경에서는 stream=False) ---
+# 스레드에 추가한 메시지부터 답변을 받을 때까지를 하나의 span으로 기록 (폴링 횟수, 토큰 사용량 포함)
+def run_and_collect(client, thread_id, assistant_id, on_text=None, stream=True, timeout=180,
+                    cursor=None, **kwargs):
+    with span("assistant.run", stream=stream, polls=0) as s:
+        if stream:
+            run, text, message_id = stream_run(
+                client, thread_id, assistant_id, on_text=on_text, timeout=timeout, **kwargs)
+        else:
+            run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, **kwargs)
+            run = wait_for_run(client, thread_id, run.id, timeout=timeout)
+            message = get_run_message(client, thread_id, run.id, cursor)
+            text, message_id = message.content[0].text.value.strip(), message.id
+        s.set(run_id=run.id)
+        s.set_usage(run.usage)
+        return run, text, message_id
@@ -0,0 +1,148 @@
+import hashlib
+import io
+import json
+import time
+from grading import build_grading_prompt, extract_score, get_partial_feedback
+
+# --- 학생 결과 시트의 열 구성 (학생 페이지 step5에서 저장하는 순서) ---
+# 시간, 평가 코드, 학년, 반, 번호, 이름, 그다음 문항마다 [문항, 점수, 답안, 피드백]
+FIRST_QUESTION_COLUMN = 6
+COLUMNS_PER_QUESTION = 4
+
+def question_columns(i):
+    base = FIRST_QUESTION_COLUMN + (i - 1) * COLUMNS_PER_QUESTION
+    return {"question": base, "score": base + 1, "answer": base + 2, "feedback": base + 3}
+
+# 행이 밀려도 같은 학생 답안을 찾을 수 있도록 시간, 평가 코드, 학년, 반, 번호, 이름으로 만든 키
+def row_key(row):
+    return hashlib.sha1("|".join(row[:6]).encode("utf-8")).hexdigest()[:12]
+
+# 답안 하나의 custom_id (행 키 + 답안 내용 + 문항 번호)
+# 저장 버튼을 두 번 눌러 같은 행이 여러 개 생기면 custom_id가 같아지므로, 한 번만 채점하고 모든 행에 반영한다.
+def answer_id(row, i):
+    answer = row[question_columns(i)["answer"]]
+    return f"{row_key(row)}-{hashlib.sha1(answer.encode('utf-8')).hexdigest()[:8]}-{i}"
+
+def padded(row):
+    return list(row) + [""] * (FIRST_QUESTION_COLUMN + 3 * COLUMNS_PER_QUESTION - len(row))
+
+# --- 채점되지 않은 답안 찾기 (1행은 머리글) ---
+def find_ungraded(values):
+    ungraded = []
+    seen = set()
+    for row_number, row in enumerate(values[1:], start=2):
+        row = padded(row)
+        for i in range(1, 4):
+            cols = question_columns(i)
+            custom_id = answer_id(row, i)
+            if custom_id in seen:
+                continue
+            if row[cols["answer"]].strip() and not row[cols["score"]] and not row[cols["feedback"]]:
+                seen.add(custom_id)
+                ungraded.append({
+                    "custom_id": custom_id,
+                    "row": row_number, "index": i, "settingname": row[1],
+                    "question": row[cols["question"]], "answer": row[cols["answer"]]})
+    return ungraded
+
+# --- 이미 일괄 채점을 요청한 답안 ---
+# 같은 시트로 요청한 batch 중 아직 진행 중이거나, 완료되었지만 반영되지 않았을 수 있는(max_age 이내) batch의
+# 입력 파일에서 custom_id를 모은다. 반영된 답안은 시트에 점수가 있으므로 어차피 다시 요청하지 않는다.
+# 목록은 최신순으로 페이지를 넘겨 가며 읽고, max_age보다 오래된 batch가 나오면 멈춘다
+# (completion_window가 24h라 그보다 오래된 batch는 진행 중일 수 없다).
+PENDING_STATUSES = ("validating", "in_progress", "finalizing")
+
+def pending_custom_ids(client, spreadsheet_id, max_age=48 * 3600):
+    ids = set()
+    for batch in client.batches.list(limit=100):
+        if time.time() - batch.created_at > max_age:
+            break
+        if (batch.metadata or {}).get("spreadsheet") != spreadsheet_id:
+            continue
+        if batch.status not in PENDING_STATUSES and batch.status != "completed":
+            continue
+        for line in client.files.content(batch.input_file_id).text.splitlines():
+            if line.strip():
+                ids.add(json.loads(line)["custom_id"])
+    return ids
+
+# --- Batch API로 한 번에 채점 요청 ---
+# Batch API는 Assistants를 지원하지 않으므로 Assistant의 instructions와 모델로 Chat Completions 요청을 만든다.
+# find_assessment(settingname)은 평가 문항 시트의 행(feedbackinstruction, assiapi2 등)을 돌려준다.
+# 이미 요청한 batch에 들어 있는 답안은 빼고 요청하며, 요청할 답안이 없으면 None
+def submit_batch(client, worksheet, find_assessment, default_assistant_id):
+    pending = pending_custom_ids(client, worksheet.spreadsheet.id)
+    ungraded = [item for item in find_ungraded(worksheet.get_all_values()) if item["custom_id"] not in pending]
+    if not ungraded:
+        return None
+
+    assistants = {}
+    lines = []
+    for item in ungraded:
+        assessment = find_assessment(item["settingname"]) or {}
+        assistant_id = assessment.get("assiapi2") or default_assistant_id
+        if assistant_id not in assistants:
+            assistants[assistant_id] = client.beta.assistants.retrieve(assistant_id)
+        assistant = assistants[assistant_id]
+
+        prompt = build_grading_prompt(
+            item["index"], item["question"], item["answer"], assessment.get("feedbackinstruction", ""))
+        lines.append(json.dumps({
+            "custom_id": item["custom_id"],
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": assistant.model,
+                "messages": [
+                    {"role": "system", "content": assistant.instructions or ""},
+                    {"role": "user", "content": prompt}],
+                "temperature": 0.01,
+                "top_p": 0.01}}, ensure_ascii=False))
+
+    batch_file = client.files.create(
+        file=("grading.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+        purpose="batch")
+    return client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"spreadsheet": worksheet.spreadsheet.id})
+
+# --- 완료된 채점 결과를 시트에 한 번에 반영 ---
+# (batch 상태, 반영한 답안 수)를 반환
+def apply_batch(client, worksheet, batch_id):
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed" or not batch.output_file_id:
+        return batch.status, 0
+
+    results = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        results[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+
+    from gspread.utils import rowcol_to_a1
+    values = worksheet.get_all_values()
+    rows = {}   # custom_id -> 같은 답안이 있는 행 번호들
+    for row_number, row in enumerate(values[1:], start=2):
+        row = padded(row)
+        for i in range(1, 4):
+            rows.setdefault(answer_id(row, i), []).append(row_number)
+
+    updates = []
+    for custom_id, feedback in results.items():
+        cols = question_columns(int(custom_id.rsplit("-", 1)[1]))
+        score = extract_score(feedback)
+        for row_number in rows.get(custom_id, []):
+            updates.append({"range": rowcol_to_a1(row_number, cols["score"] + 1),
+                            "values": [[score if score is not None else ""]]})
+            updates.append({"range": rowcol_to_a1(row_number, cols["feedback"] + 1),
+                            "values": [[get_partial_feedback(feedback)]]})
+
+    if updates:
+        worksheet.batch_update(updates)
+    return batch.status, len(updates) // 2
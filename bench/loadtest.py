@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# --- 교실 단위 동시 접속 부하 테스트 ---
+# 학생 페이지 5단계와 교사 페이지 6단계를 Streamlit AppTest로 화면 없이 실행하고,
+# OpenAI/Sheets/Firebase 대신 bench/mockservers.py의 대체 서버에 요청을 보낸다.
+# 세션 수마다 단계별 응답 시간의 p50/p95/p99와 실패 수를 출력한다.
+#
+#   python bench/loadtest.py --page student --sessions 30 300
+#   python bench/loadtest.py --page teacher --sessions 30 --openai-latency 0.3 --openai-error-rate 0.02
+#
+# 모든 세션이 한 프로세스에서 실행되므로 cache_resource(키 풀, 채점 스케줄러, 결과 저장 대기열 등)는
+# 실제 서버처럼 세션끼리 공유된다. cache_data는 AppTest가 실행할 때마다 새로 만들기 때문에 공유되지 않는다.
+# 세션이 수백 개이면 대체 서버도 같은 프로세스에서 CPU를 나눠 쓰므로, 대체 서버를 따로 띄우고 --mock-url로 지정한다.
+#   python bench/mockservers.py --port 8765 --run-duration 2 &
+#   python bench/loadtest.py --sessions 300 --mock-url http://127.0.0.1:8765
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mockservers import Fault, start_mock_server
+
+STUDENT_PAGE = os.path.join(ROOT, "studentpagetest.py")
+TEACHER_PAGE = os.path.join(ROOT, "teacherpagetest.py")
+
+# --- 대체 서버용 서비스 계정 (토큰은 대체 서버의 /token에서 받음) ---
+def make_service_account(token_uri):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+    return {
+        "type": "service_account", "project_id": "bench", "private_key_id": "bench",
+        "private_key": pem, "client_email": "bench@bench.iam.gserviceaccount.com", "client_id": "1",
+        "token_uri": token_uri}
+
+def make_secrets(mock_url, grading):
+    account = make_service_account(f"{mock_url}/token")
+    books = ["grade4_social_visang", "grade4_science_chunjae", "grade5_social_chunjae"]
+    return {
+        "api": {"keys": ["bench-key-1", "bench-key-2", "bench-key-3"]},
+        "gcp": {"credentials": json.dumps(account)},
+        "google": {"question": "bench_questions"},
+        "firebase": account,
+        "assistants": {f"{book}_{role}": f"asst_{book}_{role}" for book in books for role in ("teacher", "student")},
+        "vectorstores": {book: f"vs_{book}" for book in books},
+        "pool": {"size": 0},
+        "grading": grading,
+        "tracing": {"path": "traces.jsonl"}}     # 작업 폴더에 span 기록 (python tracing.py traces.jsonl로 요약)
+
+# --- AppTest를 여러 스레드에서 동시에 실행하기 위한 설정 ---
+# AppTest는 실행할 때마다 전역 Runtime과 st.secrets를 바꿨다가 되돌리므로, 여러 세션이 동시에 실행되면
+# 먼저 끝난 세션이 다른 세션의 Runtime/secrets를 지워 버린다. 한 번만 설치하고 AppTest는 건드리지 않게 한다.
+def install_shared_runtime(secrets):
+    import streamlit as st
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+
+    class RuntimeSlot:
+        _instance = None
+    app_test.Runtime = RuntimeSlot
+
+    # 페이지 목록 캐시도 같은 이유로 AppTest가 비우지 못하게 함 (한 프로세스에서는 한 페이지만 테스트)
+    class PagesCacheSlot:
+        _pages_cache_lock = threading.Lock()
+        _cached_pages = None
+    app_test.source_util = PagesCacheSlot
+
+    # 실제 서버처럼 컴파일한 스크립트를 모든 세션이 함께 씀 (실행마다 동시에 ast.parse하면 Python 3.11에서 깨짐)
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+    # AppTest가 실행하는 동안만 켜는 설정도 계속 켜 둠 (다른 세션이 끝나면서 끄지 않도록)
+    config.set_option("global.appTest", True)
+
+    shared = Secrets([])
+    shared._secrets = secrets
+    st.secrets = shared
+
+# --- 세션 하나의 단계별 시간 기록 ---
+class SessionTimer:
+    def __init__(self, timings, failures, lock):
+        self._timings = timings
+        self._failures = failures
+        self._lock = lock
+
+    def step(self, name, action):
+        started = time.perf_counter()
+        try:
+            at = action()
+        except Exception:
+            self._fail(name, traceback.format_exc(limit=1).strip().splitlines()[-1])
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._timings.setdefault(name, []).append(elapsed)
+        problems = [e.value for e in at.exception] + [e.value for e in at.error]
+        if problems:
+            self._fail(name, str(problems[0])[:120])
+        return at
+
+    def _fail(self, name, message):
+        with self._lock:
+            self._failures.setdefault(name, []).append(message)
+
+def find(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"'{label}' 위젯을 찾을 수 없습니다. (화면의 위젯: {[w.label for w in widgets]})")
+
+def click(at, label):
+    return lambda: find(at.button, label).click().run()
+
+def student_session(number, timer, settingname, timeout):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(STUDENT_PAGE, default_timeout=timeout)
+    timer.step("load", at.run)
+
+    at.text_input[0].input(settingname)
+    timer.step("step1 평가 코드 확인", click(at, "평가 코드 확인"))
+    timer.step("next", click(at, "다음 단계"))
+
+    find(at.text_input, "학년").input("4")
+    find(at.text_input, "반").input(str(number % 10 + 1))
+    find(at.text_input, "번호").input(str(number))
+    find(at.text_input, "이름").input(f"학생{number}")
+    timer.step("step2 학생 정보 저장", click(at, "저장"))
+    timer.step("next", click(at, "다음 단계"))
+
+    for i in range(1, 4):
+        at.text_area(key=f"answer_input_{i}").input(f"{number}번 학생의 {i}번 답안입니다. 씨가 싹 트고 자랍니다.")
+        timer.step("step3 답안 저장", click(at, f"{i}번 답안 저장"))
+    timer.step("next", click(at, "다음 단계"))
+
+    timer.step("step4 채점", click(at, "채점 결과 및 피드백 확인"))
+    timer.step("next", click(at, "다음 단계"))
+
+    timer.step("step5 결과 저장", click(at, "결과 저장"))
+
+def teacher_session(number, timer, settingname, timeout):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(TEACHER_PAGE, default_timeout=timeout)
+    timer.step("load", at.run)
+
+    at.text_input[0].input(f"{settingname}_teacher{number}_{int(time.time())}")
+    timer.step("step1 평가 코드 등록", click(at, "평가 코드 등록"))
+    timer.step("step2 기본정보 저장", click(at, "선택 저장"))
+    timer.step("step3 참고자료 선택", click(
+        at, "📁 기존에 입력되어 있는 평가 참고자료(교과서, 교육과정 문서)만 평가에 활용할 때 사용"))
+
+    # AppTest는 파일 업로드를 지원하지 않으므로 문항 이미지 없이 등록
+    for i in range(1, 4):
+        find(at.text_area, f"{i}번 문항").input(f"{i}번 문항입니다.")
+        find(at.text_area, f"{i}번 모범 답안").input(f"{i}번 모범 답안입니다.")
+    timer.step("step4 문항 등록", click(at, "문항 등록"))
+
+    find(at.text_area, "평가 주의 사항").input("3단계로 채점합니다.")
+    timer.step("step5 주의 사항 저장", click(at, "평가 주의 사항 저장"))
+
+    timer.step("step6 평가 내용 확인", click(at, "평가 내용 확인"))
+    find(at.text_input, "구글 시트 사본의 URL을 복사하여 전부 입력해주세요.").input(
+        "https://docs.google.com/spreadsheets/d/bench_results/edit")
+    timer.step("step6 평가 저장", click(at, "서술형 평가 저장"))
+
+def percentile(values, q):
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+def run_load(page, sessions, settingname, timeout, ramp):
+    timings, failures, lock = {}, {}, threading.Lock()
+    session = student_session if page == "student" else teacher_session
+    aborted = [0]
+
+    def one(number):
+        time.sleep(ramp * number / max(sessions, 1))
+        timer = SessionTimer(timings, failures, lock)
+        try:
+            session(number, timer, settingname, timeout)
+        except Exception as e:
+            with lock:
+                aborted[0] += 1
+                failures.setdefault("중단", []).append(repr(e)[:200])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(one, range(1, sessions + 1)))
+    return timings, failures, aborted[0], time.perf_counter() - started
+
+def report(page, sessions, timings, failures, aborted, elapsed):
+    rows = []
+    for name, values in timings.items():
+        rows.append({
+            "step": name, "count": len(values),
+            "p50": percentile(values, 50), "p95": percentile(values, 95), "p99": percentile(values, 99),
+            "max": max(values), "failures": len(failures.get(name, []))})
+    print(f"\n[{page}] 동시 세션 {sessions}개, 전체 {elapsed:.1f}초, 중단된 세션 {aborted}개")
+    print(f"{'단계':<24}{'횟수':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'실패':>6}")
+    for row in rows:
+        print(f"{row['step']:<24}{row['count']:>6}{row['p50']:>9.2f}{row['p95']:>9.2f}"
+              f"{row['p99']:>9.2f}{row['max']:>9.2f}{row['failures']:>6}")
+    for name, messages in failures.items():
+        print(f"  {name}: {messages[0]}")
+    return {"page": page, "sessions": sessions, "elapsed": elapsed, "aborted": aborted, "steps": rows}
+
+def main():
+    parser = argparse.ArgumentParser(description="학생/교사 페이지 동시 접속 부하 테스트")
+    parser.add_argument("--page", choices=["student", "teacher"], default="student")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[30, 300])
+    parser.add_argument("--ramp", type=float, default=5.0, help="모든 세션이 시작하기까지 걸리는 시간(초)")
+    parser.add_argument("--warmup", type=int, default=1, help="측정 전에 미리 실행할 세션 수 (0이면 첫 실행부터 측정)")
+    parser.add_argument("--timeout", type=float, default=600, help="스크립트 한 번 실행의 제한 시간(초)")
+    parser.add_argument("--run-duration", type=float, default=2.0, help="대체 서버에서 답변 하나를 만드는 시간(초)")
+    parser.add_argument("--backend", default="assistants", choices=["assistants", "chat"])
+    parser.add_argument("--output", default="text", choices=["text", "json"])
+    parser.add_argument("--no-stream", action="store_true")
+    parser.add_argument("--workers", type=int, help="채점 스케줄러의 동시 실행 수 (기본: API 키 수 × 32)")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 파일")
+    parser.add_argument("--mock-url", help="따로 띄운 대체 서버 주소 (지정하면 아래 지연/오류 설정은 그 서버의 설정을 따름)")
+    for service in ("openai", "sheets", "storage"):
+        parser.add_argument(f"--{service}-latency", type=float, default=0.05, help="요청당 평균 지연(초)")
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0, help="오류 응답 비율(0~1)")
+        parser.add_argument(f"--{service}-error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    server = None
+    if args.mock_url:
+        mock_url = args.mock_url.rstrip("/")
+    else:
+        faults = {service: Fault(latency=getattr(args, f"{service}_latency"),
+                                 jitter=getattr(args, f"{service}_latency") / 4,
+                                 error_rate=getattr(args, f"{service}_error_rate"),
+                                 error_status=getattr(args, f"{service}_error_status"))
+                  for service in ("openai", "sheets", "storage")}
+        server = start_mock_server(faults, run_duration=args.run_duration)
+        mock_url = server.url
+
+    # 앱의 클라이언트가 만들어지기 전에 대체 서버 주소를 설정
+    os.environ["OPENAI_BASE_URL"] = f"{mock_url}/v1"
+    os.environ["GSPREAD_EMULATOR_HOST"] = mock_url
+    os.environ["STORAGE_EMULATOR_HOST"] = mock_url
+    os.chdir(tempfile.mkdtemp(prefix="bench_"))     # 결과 spool, 이미지 캐시 등이 실제 서버의 것과 섞이지 않게 함
+
+    install_shared_runtime(make_secrets(mock_url, {
+        "backend": args.backend, "output": args.output, "stream": not args.no_stream,
+        "workers": args.workers, "metrics_path": None}))
+
+    # 첫 실행에서 만들어지는 공유 자원(클라이언트, 카탈로그, firebase 앱 등)은 측정에서 뺌
+    if args.warmup:
+        run_load(args.page, args.warmup, "bench", args.timeout, 0)
+
+    results = []
+    for sessions in args.sessions:
+        timings, failures, aborted, elapsed = run_load(args.page, sessions, "bench", args.timeout, args.ramp)
+        results.append(report(args.page, sessions, timings, failures, aborted, elapsed))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if server:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import traceback
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# --- 부하 테스트용 대체 서버 (OpenAI Assistants/Chat, Google Sheets/Drive, Firebase Storage) ---
+# 하나의 HTTP 서버가 경로로 서비스를 구분해서 응답한다. 서비스마다 지연 시간과 오류 비율을 따로 정할 수 있다.
+#   /v1/...                        → OpenAI (OPENAI_BASE_URL={url}/v1)
+#   /v4/spreadsheets/..., /drive/… → Sheets/Drive (GSPREAD_EMULATOR_HOST={url})
+#   /storage/v1/..., /upload/…     → Firebase Storage (STORAGE_EMULATOR_HOST={url})
+#   /token                         → 서비스 계정 토큰 (가짜 자격 증명의 token_uri)
+# python bench/mockservers.py --port 8765 로 따로 띄울 수도 있다.
+
+QUESTION_SHEET_ID = "bench_questions"
+RESULT_SHEET_ID = "bench_results"
+QUESTION_HEADER = [
+    "time", "settingname", "question1", "question2", "question3", "image1", "image2", "image3",
+    "correctanswer1", "correctanswer2", "correctanswer3", "feedbackinstruction",
+    "assiapi2", "vectorapi", "sheeturl"]
+
+# 1x1 PNG (학생 화면 문항 이미지)
+PIXEL_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082")
+
+class Fault:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+def new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+# --- A1 표기 범위를 (시작 행, 시작 열, 끝 행, 끝 열)로 (0부터, 끝은 포함, 없으면 None) ---
+def parse_a1(range_name):
+    if "!" in range_name:
+        range_name = range_name.split("!", 1)[1]
+    elif range_name.startswith("'") or not re.fullmatch(r"[A-Za-z]*\d*(:[A-Za-z]*\d*)?", range_name):
+        return 0, 0, None, None     # 시트 이름만 있으면 전체
+    bounds = []
+    for cell in range_name.split(":"):
+        letters, digits = re.fullmatch(r"([A-Za-z]*)(\d*)", cell).groups()
+        col = None
+        if letters:
+            col = 0
+            for letter in letters.upper():
+                col = col * 26 + ord(letter) - 64
+            col -= 1
+        bounds.append((int(digits) - 1 if digits else None, col))
+    (r1, c1), (r2, c2) = bounds[0], bounds[-1]
+    return r1 or 0, c1 or 0, r2, c2
+
+class MockState:
+    def __init__(self, url, run_duration=2.0, assessments=("bench",)):
+        self.url = url
+        self.run_duration = run_duration
+        self.lock = threading.Lock()
+        self.threads = {}       # thread id -> [message, ...]
+        self.runs = {}          # run id -> run
+        self.objects = {}       # (bucket, name) -> (metadata, data)
+        self.seen_prefixes = set()
+        self.sheets = {
+            QUESTION_SHEET_ID: {"title": "bench_questions", "rows": [list(QUESTION_HEADER)]},
+            RESULT_SHEET_ID: {"title": "bench_results", "rows": [["time", "settingname"]]}}
+        for name in assessments:
+            self.add_assessment(name)
+
+    def add_assessment(self, settingname):
+        images = [f"{self.url}/images/{settingname}_{i}.png" for i in range(1, 4)]
+        self.sheets[QUESTION_SHEET_ID]["rows"].append([
+            "2025-01-01 00:00:00", settingname,
+            "식물의 한살이를 설명하시오.", "물의 상태 변화를 설명하시오.", "자석의 성질을 설명하시오.",
+            *images,
+            "씨가 싹 터서 자라고 열매를 맺습니다.", "물은 얼음, 물, 수증기로 변합니다.",
+            "자석은 철을 끌어당깁니다.",
+            "3단계로 채점하고 친절한 말투로 피드백합니다.",
+            "asst_bench_student", "vs_bench",
+            f"https://docs.google.com/spreadsheets/d/{RESULT_SHEET_ID}/edit"])
+
+    # 프롬프트 앞부분이 예전 요청과 같으면 그만큼 캐시된 토큰으로 계산 (1024토큰 ≒ 2048글자 단위)
+    def usage(self, prompt, completion):
+        cached = 0
+        with self.lock:
+            for end in range(2048, len(prompt) + 1, 2048):
+                digest = hashlib.sha1(prompt[:end].encode("utf-8")).hexdigest()
+                if digest in self.seen_prefixes:
+                    cached = end // 2
+                self.seen_prefixes.add(digest)
+        prompt_tokens = len(prompt) // 2 + 1
+        completion_tokens = len(completion) // 2 + 1
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached}}
+
+def grading_reply(prompt, structured=False):
+    score = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16) % 3 + 1
+    if structured:
+        return json.dumps({
+            "score": score,
+            "reasoning": "핵심 개념을 일부 포함하고 있습니다.",
+            "feedback": "교과서의 내용을 다시 확인하고 빠진 부분을 보충해 보세요."}, ensure_ascii=False)
+    return "\n\n".join([
+        "문항: (문항)",
+        "학생 답안: (학생 답안)",
+        f"채점 결과: {score}점, 핵심 개념을 일부 포함하고 있습니다.",
+        "피드백: 교과서의 내용을 다시 확인하고 빠진 부분을 보충해 보세요. 잘한 점은 계속 살려 주세요."])
+
+def chunks(text, size=8):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    # --- 공통 ---
+    def _service(self, path):
+        if path.startswith("/v1/"):
+            return "openai"
+        if path.startswith(("/v4/", "/drive/")):
+            return "sheets"
+        if path.startswith(("/storage/", "/upload/", "/images/")):
+            return "storage"
+        return None
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self):
+        raw = self._body()
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return {"_raw": raw}
+
+    def _send(self, status, payload, content_type="application/json", headers=None):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message):
+        self._send(status, {"error": {"code": status, "message": message, "type": "mock_error"}},
+                   headers={"retry-after": "1"} if status == 429 else None)
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if path == "/token":
+            self._body()
+            return self._send(200, {"access_token": "bench", "expires_in": 3600, "token_type": "Bearer"})
+
+        service = self._service(path)
+        if service is None:
+            return self._error(404, f"unknown path {path}")
+        fault = self.server.faults[service]
+        fault.delay()
+        if fault.should_fail():
+            self._body()
+            return self._error(fault.error_status, "injected error")
+        handler = getattr(self, f"_{service}")
+        try:
+            handler(method, path, query)
+        except KeyError as e:
+            self._error(404, f"not found: {e}")
+        except Exception as e:
+            traceback.print_exc()
+            self._error(500, f"mock server error: {e}")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    # --- OpenAI ---
+    def _message(self, thread_id, role, text, run_id=None, assistant_id=None):
+        return {
+            "id": new_id("msg"), "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": thread_id, "role": role, "status": "completed",
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "assistant_id": assistant_id, "run_id": run_id, "attachments": [], "metadata": {},
+            "completed_at": int(time.time()), "incomplete_at": None, "incomplete_details": None}
+
+    def _assistant(self, assistant_id, body=None):
+        body = body or {}
+        return {
+            "id": assistant_id, "object": "assistant", "created_at": int(time.time()),
+            "name": body.get("name", "bench"), "model": body.get("model", "gpt-4o-mini"),
+            "instructions": body.get("instructions", "학생의 서술형 답안을 채점하는 도우미입니다."),
+            "description": None, "tools": body.get("tools", [{"type": "file_search"}]),
+            "tool_resources": body.get("tool_resources", {"file_search": {"vector_store_ids": ["vs_bench"]}}),
+            "metadata": body.get("metadata", {}), "temperature": 1.0, "top_p": 1.0, "response_format": "auto"}
+
+    def _finish_run(self, run):
+        # 끝난 run의 답변 메시지를 스레드에 추가 (한 번만)
+        if run["status"] == "completed":
+            return run, None
+        messages = self.state.threads[run["thread_id"]]
+        prompt = next((m["content"][0]["text"]["value"] for m in reversed(messages) if m["role"] == "user"), "")
+        reply = grading_reply(prompt, structured=isinstance(run.get("response_format"), dict))
+        message = self._message(run["thread_id"], "assistant", reply, run["id"], run["assistant_id"])
+        with self.state.lock:
+            messages.append(message)
+        run.update(status="completed", completed_at=int(time.time()), usage=self.state.usage(prompt, reply))
+        return run, message
+
+    def _stream_run(self, run):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        emit("thread.run.created", dict(run, status="queued"))
+        emit("thread.run.in_progress", dict(run, status="in_progress"))
+        run, message = self._finish_run(run)
+        emit("thread.message.created", dict(message, status="in_progress", content=[]))
+        text = message["content"][0]["text"]["value"]
+        pieces = chunks(text)
+        for piece in pieces:
+            time.sleep(self.state.run_duration / len(pieces))
+            emit("thread.message.delta", {
+                "id": message["id"], "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": piece, "annotations": []}}]}})
+        emit("thread.message.completed", message)
+        emit("thread.run.completed", run)
+        self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _openai(self, method, path, query):
+        parts = path.strip("/").split("/")[1:]     # "v1" 제외
+        body = self._json_body() if method in ("POST", "PATCH") else {}
+        state = self.state
+
+        if parts == ["chat", "completions"]:
+            return self._chat_completion(body)
+
+        if parts[0] == "assistants":
+            if method == "POST" and len(parts) == 1:
+                return self._send(200, self._assistant(new_id("asst"), body))
+            if method == "DELETE":
+                return self._send(200, {"id": parts[1], "object": "assistant.deleted", "deleted": True})
+            if len(parts) == 1:
+                return self._send(200, {"object": "list", "data": [], "has_more": False})
+            return self._send(200, self._assistant(parts[1], body))
+
+        if parts[0] == "vector_stores":
+            if len(parts) == 3 and parts[2] == "search":
+                return self._send(200, {"object": "vector_store.search_results.page", "data": [
+                    {"file_id": "file_bench", "filename": "교과서.pdf", "score": 0.9,
+                     "content": [{"type": "text", "text": "식물은 씨가 싹 터서 자라고 꽃이 피고 열매를 맺습니다."}]}]})
+            if len(parts) == 1 and method == "GET":
+                return self._send(200, {"object": "list", "data": [], "has_more": False})
+            vector_store_id = parts[1] if len(parts) > 1 else new_id("vs")
+            return self._send(200, {"id": vector_store_id, "object": "vector_store", "created_at": int(time.time()),
+                                    "name": body.get("name", "bench"), "status": "completed", "metadata": {},
+                                    "file_counts": {"in_progress": 0, "completed": 0, "failed": 0,
+                                                    "cancelled": 0, "total": 0}, "usage_bytes": 0})
+
+        if parts[0] != "threads":
+            return self._error(404, f"unsupported endpoint {path}")
+
+        if len(parts) == 1:
+            thread_id = new_id("thread")
+            with state.lock:
+                state.threads[thread_id] = []
+            return self._send(200, {"id": thread_id, "object": "thread", "created_at": int(time.time()),
+                                    "metadata": {}, "tool_resources": body.get("tool_resources")})
+
+        thread_id = parts[1]
+        messages = state.threads[thread_id]
+        if parts[2:] == ["messages"]:
+            if method == "POST":
+                message = self._message(thread_id, body.get("role", "user"), body.get("content", ""))
+                with state.lock:
+                    messages.append(message)
+                return self._send(200, message)
+            data = list(messages)
+            if query.get("run_id"):
+                data = [m for m in data if m["run_id"] == query["run_id"]]
+            if query.get("order", "desc") == "desc":
+                data.reverse()
+            if query.get("before"):
+                ids = [m["id"] for m in data]
+                data = data[:ids.index(query["before"])] if query["before"] in ids else data
+            data = data[:int(query.get("limit", 20))]
+            return self._send(200, {"object": "list", "data": data, "has_more": False,
+                                    "first_id": data[0]["id"] if data else None,
+                                    "last_id": data[-1]["id"] if data else None})
+
+        if parts[2] == "runs":
+            if len(parts) == 3:
+                run = {
+                    "id": new_id("run"), "object": "thread.run", "created_at": int(time.time()),
+                    "thread_id": thread_id, "assistant_id": body.get("assistant_id"), "status": "queued",
+                    "model": "gpt-4o-mini", "instructions": "", "tools": [], "metadata": {},
+                    "response_format": body.get("response_format", "auto"),
+                    "truncation_strategy": body.get("truncation_strategy", {"type": "auto", "last_messages": None}),
+                    "temperature": body.get("temperature"), "top_p": body.get("top_p"),
+                    "tool_choice": "auto", "parallel_tool_calls": True, "usage": None,
+                    "last_error": None, "incomplete_details": None, "required_action": None,
+                    "started_at": None, "completed_at": None, "cancelled_at": None, "failed_at": None,
+                    "expires_at": None, "max_completion_tokens": None, "max_prompt_tokens": None,
+                    "_started": time.monotonic()}
+                with state.lock:
+                    state.runs[run["id"]] = run
+                if body.get("stream"):
+                    return self._stream_run(self._public(run))
+                return self._send(200, self._public(run))
+
+            run = state.runs[parts[3]]
+            if parts[4:] == ["cancel"]:
+                run["status"] = "cancelled"
+            elif run["status"] not in ("completed", "cancelled"):
+                if time.monotonic() - run["_started"] >= state.run_duration:
+                    self._finish_run(run)
+                else:
+                    run["status"] = "in_progress"
+            return self._send(200, self._public(run))
+
+        return self._error(404, f"unsupported endpoint {path}")
+
+    def _public(self, run):
+        return {k: v for k, v in run.items() if not k.startswith("_")}
+
+    def _chat_completion(self, body):
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        reply = grading_reply(prompt, structured=isinstance(body.get("response_format"), dict))
+        usage = self.state.usage(prompt, reply)
+        base = {"id": new_id("chatcmpl"), "created": int(time.time()), "model": body.get("model", "gpt-4o-mini")}
+        if not body.get("stream"):
+            time.sleep(self.state.run_duration)
+            return self._send(200, dict(base, object="chat.completion", usage=usage, choices=[
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}]))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        pieces = chunks(reply)
+        for piece in pieces:
+            time.sleep(self.state.run_duration / len(pieces))
+            chunk = dict(base, object="chat.completion.chunk", choices=[
+                {"index": 0, "finish_reason": None, "delta": {"content": piece}}])
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = dict(base, object="chat.completion.chunk", choices=[], usage=usage)
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    # --- Google Sheets / Drive ---
+    def _metadata(self, sheet_id):
+        sheet = self.state.sheets[sheet_id]
+        return {"spreadsheetId": sheet_id, "properties": {"title": sheet["title"], "locale": "ko_KR"},
+                "sheets": [{"properties": {"sheetId": 0, "title": "Sheet1", "index": 0, "sheetType": "GRID",
+                                           "gridProperties": {"rowCount": max(1000, len(sheet["rows"])),
+                                                              "columnCount": 26}}}]}
+
+    def _sheets(self, method, path, query):
+        if path.startswith("/drive/"):
+            self._body()
+            return self._send(200, {"files": [
+                {"id": sheet_id, "name": sheet["title"], "createdTime": "2025-01-01T00:00:00.000Z",
+                 "modifiedTime": "2025-01-01T00:00:00.000Z"}
+                for sheet_id, sheet in self.state.sheets.items()]})
+
+        match = re.fullmatch(r"/v4/spreadsheets/([^/:]+)(?:/values/(.+?))?(:\w+)?", path)
+        sheet_id, range_name, action = match.groups()
+        sheet = self.state.sheets[sheet_id]
+        body = self._json_body() if method == "POST" else {}
+
+        if range_name is None and action is None:
+            return self._send(200, self._metadata(sheet_id))
+
+        if action == ":append":
+            with self.state.lock:
+                start = len(sheet["rows"])
+                sheet["rows"].extend(body.get("values", []))
+            return self._send(200, {"spreadsheetId": sheet_id, "updates": {
+                "spreadsheetId": sheet_id, "updatedRange": f"Sheet1!A{start + 1}",
+                "updatedRows": len(body.get("values", []))}})
+
+        if path.endswith("/values:batchUpdate"):
+            with self.state.lock:
+                for update in body.get("data", []):
+                    r1, c1, _, _ = parse_a1(update["range"])
+                    for dr, values in enumerate(update["values"]):
+                        while len(sheet["rows"]) <= r1 + dr:
+                            sheet["rows"].append([])
+                        row = sheet["rows"][r1 + dr]
+                        row.extend([""] * (c1 + len(values) - len(row)))
+                        row[c1:c1 + len(values)] = values
+            return self._send(200, {"spreadsheetId": sheet_id, "totalUpdatedCells": len(body.get("data", []))})
+
+        r1, c1, r2, c2 = parse_a1(range_name)
+        with self.state.lock:
+            rows = [list(row) for row in sheet["rows"][r1:None if r2 is None else r2 + 1]]
+        values = [row[c1:None if c2 is None else c2 + 1] for row in rows]
+        if query.get("majorDimension") == "COLUMNS":
+            width = max((len(row) for row in values), default=0)
+            values = [[row[c] if c < len(row) else "" for row in values] for c in range(width)]
+            values = [list(col) for col in values]
+            for col in values:
+                while col and col[-1] == "":
+                    col.pop()
+        return self._send(200, {"range": range_name, "majorDimension": query.get("majorDimension", "ROWS"),
+                                "values": values})
+
+    # --- Firebase Storage ---
+    def _object_metadata(self, bucket, name, data, content_type, acl=None):
+        return {"kind": "storage#object", "id": f"{bucket}/{name}/1", "name": name, "bucket": bucket,
+                "generation": "1", "metageneration": "1", "contentType": content_type,
+                "size": str(len(data)), "md5Hash": "", "acl": acl or []}
+
+    def _storage(self, method, path, query):
+        if path.startswith("/images/"):
+            return self._send(200, PIXEL_PNG, content_type="image/png")
+
+        if path.startswith("/upload/"):
+            bucket = path.split("/")[5]
+            raw = self._body()
+            match = re.search(rb'\{[^{}]*"name"\s*:\s*"([^"]+)"[^{}]*\}', raw)
+            name = query.get("name") or (json.loads(f'"{match.group(1).decode()}"') if match else new_id("obj"))
+            content_type = "application/octet-stream"
+            type_match = re.search(rb'"contentType"\s*:\s*"([^"]+)"', raw)
+            if type_match:
+                content_type = type_match.group(1).decode()
+            metadata = self._object_metadata(bucket, name, raw, content_type)
+            with self.state.lock:
+                self.state.objects[(bucket, name)] = (metadata, raw)
+            return self._send(200, metadata)
+
+        match = re.fullmatch(r"/storage/v1/b/([^/]+)/o/(.+)", path)
+        if not match:
+            self._body()
+            return self._error(404, f"unsupported endpoint {path}")
+        bucket, name = match.groups()
+        body = self._json_body() if method == "PATCH" else {}
+        with self.state.lock:
+            stored = self.state.objects.get((bucket, name))
+        if stored is None:
+            return self._error(404, "No such object")
+        metadata, data = stored
+        if method == "PATCH":
+            metadata = dict(metadata, acl=body.get("acl", metadata["acl"]))
+            with self.state.lock:
+                self.state.objects[(bucket, name)] = (metadata, data)
+        return self._send(200, metadata)
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, faults, run_duration=2.0, assessments=("bench",)):
+        super().__init__(address, MockHandler)
+        self.url = f"http://{self.server_address[0]}:{self.server_address[1]}"
+        self.faults = faults
+        self.state = MockState(self.url, run_duration=run_duration, assessments=assessments)
+
+# 백그라운드 스레드에서 서버 시작, faults는 {"openai": Fault, "sheets": Fault, "storage": Fault}
+def start_mock_server(faults=None, host="127.0.0.1", port=0, run_duration=2.0, assessments=("bench",)):
+    faults = dict({"openai": Fault(), "sheets": Fault(), "storage": Fault()}, **(faults or {}))
+    server = MockServer((host, port), faults, run_duration=run_duration, assessments=assessments)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="부하 테스트용 OpenAI/Sheets/Firebase 대체 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--run-duration", type=float, default=2.0, help="run 하나가 답변을 만드는 시간(초)")
+    for service in ("openai", "sheets", "storage"):
+        parser.add_argument(f"--{service}-latency", type=float, default=0.0)
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    faults = {service: Fault(latency=getattr(args, f"{service}_latency"),
+                             jitter=getattr(args, f"{service}_latency") / 4,
+                             error_rate=getattr(args, f"{service}_error_rate"))
+              for service in ("openai", "sheets", "storage")}
+    server = MockServer((args.host, args.port), faults, run_duration=args.run_duration)
+    print(f"대체 서버: {server.url}")
+    server.serve_forever()
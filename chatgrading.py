@@ -0,0 +1,73 @@
+import time
+from tracing import span
+
+# --- Assistant 없이 한 번의 요청으로 채점 (grading.backend = "chat") ---
+# 스레드 생성, 메시지 추가, run 생성, 상태 확인, 메시지 조회(문항당 5번 이상)를 Chat Completions 요청 1번으로 줄인다.
+# Assistant의 instructions와 모델은 그대로 쓰고, file_search 대신 모범 답안과 벡터스토어에서 미리 찾은 교재 내용을 프롬프트에 넣는다.
+
+def load_assistant_profile(client, assistant_id):
+    assistant = client.beta.assistants.retrieve(assistant_id)
+    return {"model": assistant.model, "instructions": assistant.instructions or ""}
+
+# 벡터스토어에서 문항과 관련된 교재 내용 찾기 (openai 패키지에 검색 메서드가 없어 API를 직접 호출)
+# 검색 오류는 그대로 올려 보냄 (호출하는 쪽에서 잡아서 교재 내용 없이 채점, 실패한 결과가 캐시되지 않도록)
+def search_excerpts(client, vector_store_id, query, max_results=3):
+    result = client.post(
+        f"/vector_stores/{vector_store_id}/search",
+        body={"query": query, "max_num_results": max_results},
+        cast_to=object)
+
+    excerpts = []
+    for item in result.get("data", []):
+        for content in item.get("content", []):
+            if content.get("type") == "text" and content.get("text", "").strip():
+                excerpts.append(content["text"].strip())
+    return excerpts
+
+def build_reference(correctanswer, excerpts=()):
+    parts = []
+    if correctanswer:
+        parts.append(f"모범 답안: {correctanswer}")
+    if excerpts:
+        parts.append("교재 내용:\n" + "\n---\n".join(excerpts))
+    return "\n\n".join(parts)
+
+# 채점 요청 1번, on_text에는 새로 생성된 글자 조각이 전달되고 (전체 답변, 토큰 사용량)을 반환
+def grade_with_chat(client, profile, content, on_text=None, stream=True, response_format=None, timeout=180):
+    with span("chat.grade", stream=stream) as s:
+        text, usage = _complete(client, profile, content, on_text, stream, response_format, timeout, s)
+        s.set_usage(usage)
+        return text, usage
+
+def _complete(client, profile, content, on_text, stream, response_format, timeout, s):
+    options = {
+        "model": profile["model"],
+        "messages": [
+            {"role": "system", "content": profile["instructions"]},
+            {"role": "user", "content": content}],
+        "temperature": 0.01,
+        "top_p": 0.01,
+        "timeout": timeout}
+    if response_format:
+        options["response_format"] = response_format
+
+    if not stream:
+        completion = client.chat.completions.create(**options)
+        return completion.choices[0].message.content.strip(), completion.usage
+
+    parts = []
+    usage = None
+    started = time.monotonic()
+    for chunk in client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **options):
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if not parts:
+                s.set(first_token=round(time.monotonic() - started, 3))
+            parts.append(delta)
+            if on_text:
+                on_text(delta)
+    return "".join(parts).strip(), usage
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# --- 채점 결과 캐시 ---
+# 같은 평가, 같은 문항, 같은 평가 주의 사항에 (띄어쓰기, 문장 끝 문장부호만 다른) 같은 답안이면
+# run을 다시 실행하지 않고 저장해 둔 피드백과 점수를 돌려준다.
+# 메모리에는 LRU로 maxsize개까지, path를 주면 SQLite 파일에도 저장해서 재시작 후에도 사용한다.
+# 숫자의 부호, 소수점, 부등호 등은 답을 바꾸므로 그대로 두고, 띄어쓰기와 문장 끝 문장부호만 무시한다.
+def normalize_answer(text):
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[.!?…~]+(?=\s|$)", "", text)
+    text = re.sub(r"(?<=\d)\s+(?=\d)", " ", text)     # "1 5"와 "15"는 구분
+    return re.sub(r"\s+(?![\d])|(?<!\d)\s+", "", text)
+
+# 정규화 방식이 바뀌면 KEY_VERSION을 올려서, 예전 방식으로 저장된 결과(SQLite)를 쓰지 않게 함
+KEY_VERSION = 2
+
+def make_key(settingname, question, instructions, answer, *extra):
+    parts = [KEY_VERSION, settingname, question, instructions, normalize_answer(answer), *extra]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class FeedbackCache:
+    def __init__(self, maxsize=2048, ttl=7 * 24 * 3600, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()     # key -> (feedback, score, created)
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                "key TEXT PRIMARY KEY, feedback TEXT, score INTEGER, created REAL)")
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT feedback, score, created FROM feedback WHERE key = ?", (key,)).fetchone()
+                if row:
+                    item = row
+                    self._remember(key, item)
+            if item is None:
+                return None
+            if now - item[2] > self.ttl:
+                self._forget(key)
+                return None
+            self._items.move_to_end(key)
+            return item[0], item[1]
+
+    def put(self, key, feedback, score):
+        item = (feedback, score, time.time())
+        with self._lock:
+            self._remember(key, item)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO feedback (key, feedback, score, created) VALUES (?, ?, ?, ?)",
+                    (key, *item))
+                self._db.execute("DELETE FROM feedback WHERE created < ?", (time.time() - self.ttl,))
+                self._db.commit()
+
+    def _remember(self, key, item):
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def _forget(self, key):
+        self._items.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM feedback WHERE key = ?", (key,))
+            self._db.commit()
@@ -0,0 +1,79 @@
+import json
+import re
+
+# --- 채점 프롬프트 및 결과 처리 (학생 페이지와 일괄 채점이 함께 사용) ---
+# 모든 요청에 같은 채점 규칙을 맨 앞에 두고, 평가마다 같은 주의 사항, 문항마다 같은 문항과 참고 자료 순으로 쌓은 뒤
+# 학생마다 달라지는 답안은 맨 마지막에 둔다. 앞부분이 같은 요청끼리 OpenAI의 프롬프트 캐시를 함께 쓰게 된다.
+GRADING_RULES = """학생의 답안을 채점하고, 
+** instructions에 따라 1~5문단 형식으로 피드백을 작성해주세요.
+** instructions에 나와 있는 대로 생성합니다. 
+instructions에 따르면 채점 결과에 따라 생성하는 피드백의 내용이 달라지므로 꼭 확인하세요. 
+문항, 학생이 입력한 답안, 채점 결과(점수+이유), 피드백 내용(점수에 따라 피드백 형식이 달라짐)을 각각 서로 다른 문단으로 나눠서 읽기 쉽게 보여주세요."""
+
+def layout_prompt(rules, i, question, answer, instructions, reference=""):
+    parts = [rules, f"평가 주의 사항: {instructions}", f"{i}번 문항: {question}"]
+    if reference:
+        parts.append(reference)
+    parts.append(f"학생 답안: {answer}")
+    return "\n\n".join(parts)
+
+def build_grading_prompt(i, question, answer, instructions, reference=""):
+    return layout_prompt(GRADING_RULES, i, question, answer, instructions, reference)
+
+def extract_score(text):
+    match = re.search(r"(\d+)\s*점", text)
+    return int(match.group(1)) if match else None
+
+# 피드백에서 문항, 학생 답안 문단을 빼고 채점 결과부터 저장
+def get_partial_feedback(text):
+    paragraphs = re.split(r'\n{2,}', text.strip())
+    return "\n\n".join(paragraphs[2:]) if len(paragraphs) >= 3 else text
+
+# --- 구조화된 채점 결과 (grading.output = "json") ---
+# 점수, 채점 이유, 피드백을 JSON 필드로 따로 받아서 정규식으로 점수를 찾지 않아도 되게 함
+GRADING_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "grading_result",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer"},
+                "reasoning": {"type": "string"},
+                "feedback": {"type": "string"}},
+            "required": ["score", "reasoning", "feedback"],
+            "additionalProperties": False}}}
+
+STRUCTURED_RULES = """학생의 답안을 채점하고, 결과를 JSON으로만 답해주세요.
+** instructions에 나와 있는 대로 채점하고, 채점 결과에 따라 피드백 내용을 다르게 작성합니다.
+- score: 채점 결과 점수 (정수)
+- reasoning: 점수를 준 이유 (1~2문장)
+- feedback: 학생에게 줄 피드백 (문항과 학생 답안은 다시 쓰지 않음)"""
+
+def build_structured_prompt(i, question, answer, instructions, reference=""):
+    return layout_prompt(STRUCTURED_RULES, i, question, answer, instructions, reference)
+
+def parse_structured_result(text):
+    try:
+        result = json.loads(text)
+        return {"score": result.get("score"),
+                "reasoning": str(result.get("reasoning", "")).strip(),
+                "feedback": str(result.get("feedback", "")).strip()}
+    except (ValueError, AttributeError):
+        # JSON이 아니면 예전 방식으로 처리
+        return {"score": extract_score(text), "reasoning": "", "feedback": text}
+
+# 화면에 보여줄 피드백 (문항, 학생 답안, 채점 결과, 피드백을 문단으로 나눔)
+def format_structured_feedback(question, answer, result):
+    score = f"{result['score']}점" if result["score"] is not None else ""
+    return "\n\n".join([
+        f"**문항**: {question}",
+        f"**학생 답안**: {answer}",
+        f"**채점 결과**: {score} {result['reasoning']}".rstrip(),
+        result["feedback"]])
+
+# 시트에 저장할 피드백 (채점 결과와 피드백만)
+def structured_sheet_feedback(result):
+    score = f"{result['score']}점 " if result["score"] is not None else ""
+    return f"채점 결과: {score}{result['reasoning']}".rstrip() + "\n\n" + result["feedback"]
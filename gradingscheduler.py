@@ -0,0 +1,135 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from tracing import span
+
+class QueueFullError(Exception):
+    pass
+
+class GradingJob:
+    def __init__(self, group, fn, args, kwargs, job_key=None, fingerprint=None):
+        self.group = group
+        self.job_key = job_key          # 같은 세션, 같은 문항의 요청을 찾기 위한 값
+        self.fingerprint = fingerprint  # 요청 내용 (같으면 진행 중인 작업을 그대로 사용)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        # 요청한 세션의 추적 태그(세션, 단계 등)를 작업 스레드에서도 그대로 쓰도록 보관
+        self.context = contextvars.copy_context()
+        self.queued_at = time.monotonic()
+
+# --- 채점 요청 스케줄러 (프로세스당 하나, 모든 세션이 공유) ---
+# 정해진 수(workers)의 작업 스레드만 run을 실행하고, 나머지 요청은 반(group)별 대기열에서 기다린다.
+# 반별 대기열을 돌아가며 하나씩 꺼내므로 한 반이 한꺼번에 요청해도 다른 반이 계속 밀리지 않는다.
+# 대기열 전체가 max_queue를 넘으면 새 요청은 QueueFullError로 거절한다.
+# job_key를 주면 끝나지 않은 작업을 active로 찾을 수 있어서, 다시 요청할 때 이어 받거나 cancel로 취소할 수 있다.
+class GradingScheduler:
+    def __init__(self, workers=32, max_queue=500, initial_duration=20.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()    # group -> deque of GradingJob
+        self._queued = 0
+        self._running = 0
+        self._active = {}               # job_key -> 끝나지 않은 GradingJob
+        self._avg_duration = initial_duration
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, group, fn, *args, job_key=None, fingerprint=None, **kwargs):
+        job = GradingJob(group, fn, args, kwargs, job_key, fingerprint)
+        with self._cond:
+            if self._queued >= self.max_queue:
+                raise QueueFullError("채점 요청이 너무 많습니다.")
+            self._queues.setdefault(group, deque()).append(job)
+            self._queued += 1
+            if job_key is not None:
+                self._active[job_key] = job
+            self._cond.notify()
+        job.future.add_done_callback(lambda future: self._forget(job))
+        return job
+
+    # job_key로 넣은 작업 중 아직 끝나지 않은 것 (없으면 None)
+    def active(self, job_key):
+        with self._cond:
+            job = self._active.get(job_key)
+        return job if job and not job.future.done() else None
+
+    # 아직 대기 중인 작업이면 대기열에서 빼고 취소 (이미 실행 중이거나 끝났으면 False)
+    def cancel(self, job):
+        with self._cond:
+            queue = self._queues.get(job.group)
+            if not queue or job not in queue:
+                return False
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.group]
+            self._queued -= 1
+        return job.future.cancel()
+
+    def _forget(self, job):
+        with self._cond:
+            if job.job_key is not None and self._active.get(job.job_key) is job:
+                del self._active[job.job_key]
+
+    # 이 작업보다 먼저 실행될 작업 수 (0이면 다음 차례, None이면 이미 실행 중이거나 끝남)
+    def position(self, job):
+        with self._cond:
+            queue = self._queues.get(job.group)
+            if not queue or job not in queue:
+                return None
+            rank = queue.index(job)
+            ahead = rank
+            for index, (group, other) in enumerate(self._queues.items()):
+                if group == job.group:
+                    continue
+                # 돌아가며 꺼내므로 다른 반은 최대 rank개(이번 차례에 앞선 반이면 rank + 1개)까지 먼저 실행됨
+                before = index < list(self._queues).index(job.group)
+                ahead += min(len(other), rank + (1 if before else 0))
+            return ahead
+
+    # 예상 대기 시간(초)
+    def eta(self, job):
+        ahead = self.position(job)
+        if ahead is None:
+            return 0
+        rounds = ahead // self.workers + (1 if self._running >= self.workers else 0)
+        return rounds * self._avg_duration
+
+    def _next_job(self):
+        group, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        if queue:
+            self._queues.move_to_end(group)
+        else:
+            del self._queues[group]
+        self._queued -= 1
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                job = self._next_job()
+                self._running += 1
+
+            if job.future.set_running_or_notify_cancel():
+                started = time.monotonic()
+                try:
+                    job.future.set_result(job.context.run(self._run, job, started - job.queued_at))
+                except BaseException as e:
+                    job.future.set_exception(e)
+                duration = time.monotonic() - started
+                with self._cond:
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+            with self._cond:
+                self._running -= 1
+
+    def _run(self, job, waited):
+        with span("grading.job", group=job.group, waited=round(waited, 3)):
+            return job.fn(*job.args, **job.kwargs)
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import requests
+from tracing import TracingAdapter
+
+# --- 문항 이미지 캐시 ---
+# 학생마다 firebase에서 같은 이미지를 내려받지 않도록, 서버가 한 번만 받아서 메모리와 디스크에 보관한다.
+# 메모리와 디스크 모두 전체 크기(바이트)를 넘으면 가장 오래 쓰지 않은 이미지부터 지운다.
+# 받아오지 못한 이미지는 failure_ttl 동안 다시 시도하지 않고 바로 None을 돌려준다
+# (firebase나 학교 인터넷이 느릴 때 다시 실행될 때마다 스크립트가 기다리지 않도록, 화면은 원래 주소를 사용).
+class ImageCache:
+    def __init__(self, cache_dir="image_cache", max_memory_bytes=64 * 1024 * 1024,
+                 max_disk_bytes=512 * 1024 * 1024, timeout=(2, 10), failure_ttl=60):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.timeout = timeout          # (연결, 읽기) 제한 시간(초)
+        self.failure_ttl = failure_ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()    # key -> bytes
+        self._memory_bytes = 0
+        self._fetch_locks = {}
+        self._failed_until = {}         # key -> 다시 시도할 시각
+        self._session = requests.Session()
+        self._session.mount("https://", TracingAdapter("firebase"))
+        self._session.mount("http://", TracingAdapter("firebase"))
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old)
+
+    def _from_memory(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            return data
+
+    def _from_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)      # 최근에 사용한 이미지로 표시
+            return data
+        except OSError:
+            return None
+
+    def _save_to_disk(self, key, data):
+        path = self._path(key)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            stat = os.stat(self._path(name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes or name == key:
+                continue
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+            total -= size
+
+    # 이미지 내용을 돌려주고, 받아올 수 없으면 None
+    def get(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        data = self._from_memory(key)
+        if data is not None:
+            return data
+        with self._lock:
+            if self._failed_until.get(key, 0) > time.monotonic():
+                return None
+
+        # 같은 이미지를 여러 세션이 동시에 요청해도 한 번만 내려받음
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        try:
+            with fetch_lock:
+                data = self._from_memory(key) or self._from_disk(key)
+                if data is None:
+                    with self._lock:
+                        if self._failed_until.get(key, 0) > time.monotonic():
+                            return None
+                    try:
+                        response = self._session.get(url, timeout=self.timeout)
+                        response.raise_for_status()
+                    except requests.RequestException:
+                        with self._lock:
+                            self._failed_until[key] = time.monotonic() + self.failure_ttl
+                        return None
+                    data = response.content
+                    self._save_to_disk(key, data)
+                self._remember(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._fetch_locks.pop(key, None)
+                now = time.monotonic()
+                for failed_key in [k for k, until in self._failed_until.items() if until <= now]:
+                    del self._failed_until[failed_key]
@@ -0,0 +1,231 @@
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+from tracing import span
+
+# --- 응답 헤더의 시간 형식("1s", "6m0s", "250ms")을 초로 변환 ---
+def parse_duration(value):
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(num) * units[unit] for num, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value))
+
+# --- 키 풀에서 쓰는 OpenAI 클라이언트 ---
+# 429는 KeyPool이 다른 키로 다시 보내므로 SDK는 다시 시도하지 않고,
+# 5xx, 연결 오류, 시간 초과는 지금까지처럼 SDK가 같은 키로 다시 시도한다.
+def make_openai_client(**options):
+    import openai
+
+    class PooledOpenAI(openai.OpenAI):
+        def _should_retry(self, response):
+            if response.status_code == 429:
+                return False
+            return super()._should_retry(response)
+
+    return PooledOpenAI(**options)
+
+# --- API 키 풀 ---
+# 키마다 진행 중인 요청 수, 토큰 수와 rate limit 헤더(남은 요청/토큰 수)를 기록해 두고,
+# 요청할 때마다 가장 여유 있는 키를 고른다. 429를 받으면 그 키를 잠시 쉬게 하고 다른 키로 다시 보낸다.
+# 어떤 키로 만든 스레드, Assistant, 벡터스토어, 파일은 이후 요청도 같은 키로 보낸다(affinity).
+class KeyPool:
+    def __init__(self, keys, max_attempts=4, max_wait=20, affinity_size=100000, **client_options):
+        self.max_attempts = max_attempts
+        self.max_wait = max_wait
+        self.affinity_size = affinity_size
+        self._lock = threading.Lock()
+        self._keys = list(keys)
+        self._in_flight = {key: 0 for key in self._keys}
+        self._tokens_in_flight = {key: 0 for key in self._keys}
+        self._remaining_requests = {key: None for key in self._keys}
+        self._remaining_tokens = {key: None for key in self._keys}
+        self._cooldown_until = {key: 0.0 for key in self._keys}
+        self._affinity = OrderedDict()  # 리소스 id -> key
+        self._client_options = client_options
+        self._clients = {}
+        self.client = PooledClient(self, ())
+
+    @property
+    def key_count(self):
+        return len(self._keys)
+
+    # openai 패키지는 가져오는 데 시간이 걸리므로 키별 클라이언트는 처음 요청할 때 만든다
+    def _client(self, key):
+        with self._lock:
+            if key not in self._clients:
+                import openai
+                self._clients[key] = make_openai_client(
+                    api_key=key,
+                    http_client=openai.DefaultHttpxClient(
+                        event_hooks={"response": [lambda response, key=key: self._record(key, response)]}),
+                    **self._client_options)
+            return self._clients[key]
+
+    def _record(self, key, response):
+        headers = response.headers
+        with self._lock:
+            if "x-ratelimit-remaining-requests" in headers:
+                self._remaining_requests[key] = int(headers["x-ratelimit-remaining-requests"])
+            if "x-ratelimit-remaining-tokens" in headers:
+                self._remaining_tokens[key] = int(headers["x-ratelimit-remaining-tokens"])
+            if response.status_code == 429:
+                wait = parse_duration(headers.get("retry-after")) or max(
+                    parse_duration(headers.get("x-ratelimit-reset-requests")),
+                    parse_duration(headers.get("x-ratelimit-reset-tokens")), 1.0)
+                self._cooldown_until[key] = max(self._cooldown_until[key], time.monotonic() + wait)
+
+    def _pick(self, exclude=()):
+        now = time.monotonic()
+        with self._lock:
+            candidates = [key for key in self._keys if key not in exclude] or self._keys
+            ready = [key for key in candidates if self._cooldown_until[key] <= now] or candidates
+
+            def load(key):
+                requests = self._remaining_requests[key]
+                tokens = self._remaining_tokens[key]
+                return (
+                    self._cooldown_until[key] > now,
+                    self._in_flight[key],
+                    self._tokens_in_flight[key],
+                    -(requests if requests is not None else float("inf")),
+                    -(tokens if tokens is not None else float("inf")),
+                    random.random())
+            return min(ready, key=load)
+
+    def _affinity_key(self, args, kwargs):
+        with self._lock:
+            for value in list(args) + list(kwargs.values()):
+                if isinstance(value, str) and value in self._affinity:
+                    return self._affinity[value]
+        return None
+
+    def bind(self, resource_id, key):
+        with self._lock:
+            self._affinity[resource_id] = key
+            self._affinity.move_to_end(resource_id)
+            while len(self._affinity) > self.affinity_size:
+                self._affinity.popitem(last=False)
+
+    def _release(self, key, tokens):
+        with self._lock:
+            self._in_flight[key] -= 1
+            self._tokens_in_flight[key] -= tokens
+
+    def call(self, path, args, kwargs):
+        # stream()은 호출할 때가 아니라 with 문에 들어갈 때 요청을 보내므로, 들어갈 때 키를 고르도록 감싸서 돌려줌
+        if path[-1] == "stream":
+            return PooledStream(self, path, args, kwargs)
+        with span("openai." + ".".join(path)) as s:
+            result = self._call(path, args, kwargs, s)
+            s.set_usage(getattr(result, "usage", None))
+            return result
+
+    # enter=True면 결과(stream manager)의 with 문에 들어간 뒤 (key, 추정 토큰 수, (manager, stream))를 돌려주고,
+    # 진행 중인 요청 수는 stream을 닫을 때(_release) 줄인다.
+    def _call(self, path, args, kwargs, s, enter=False):
+        import openai
+        pinned = self._affinity_key(args, kwargs)
+        tokens = len(str(kwargs)) // 3     # 요청 토큰 수 대략 추정 (한글은 글자당 1토큰 안팎)
+        tried = []
+        for attempt in range(self.max_attempts):
+            key = pinned or self._pick(exclude=tried)
+            wait = self._cooldown_until[key] - time.monotonic()
+            if wait > 0 and (pinned or len(tried) + 1 >= len(self._keys)):
+                # 같은 키를 써야 하거나 모든 키가 쉬는 중이면 풀릴 때까지 기다림
+                time.sleep(min(wait, self.max_wait))
+
+            s.set(attempts=attempt + 1, key=self._keys.index(key))
+            target = self._client(key)
+            for name in path:
+                target = getattr(target, name)
+
+            with self._lock:
+                self._in_flight[key] += 1
+                self._tokens_in_flight[key] += tokens
+            held = False
+            try:
+                result = target(*args, **kwargs)
+                if enter:
+                    result = (result, result.__enter__())
+                    held = True
+            except openai.RateLimitError as e:
+                # 헤더로 쉬는 시간을 알 수 없어도 최소 1초는 이 키를 피함 (사용 한도 초과는 10분)
+                cooldown = 600 if getattr(e, "code", None) == "insufficient_quota" else 1.0
+                with self._lock:
+                    self._cooldown_until[key] = max(self._cooldown_until[key], time.monotonic() + cooldown)
+                tried.append(key)
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                continue
+            finally:
+                if not held:
+                    self._release(key, tokens)
+
+            if enter:
+                return key, tokens, result
+            if path[-1] in ("create", "create_and_poll") and isinstance(getattr(result, "id", None), str):
+                self.bind(result.id, key)
+            if isinstance(getattr(result, "thread_id", None), str):
+                self.bind(result.thread_id, key)
+            return result
+
+# --- openai.OpenAI처럼 쓸 수 있는 대리 클라이언트 ---
+# client.beta.threads.runs.create(...)처럼 속성을 따라가다가 호출하는 순간 KeyPool이 키를 골라 실행한다.
+class PooledClient:
+    def __init__(self, pool, path):
+        self._pool = pool
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return PooledClient(self._pool, self._path + (name,))
+
+    def __call__(self, *args, **kwargs):
+        return self._pool.call(self._path, args, kwargs)
+
+# --- runs.stream(...)의 대리 stream manager ---
+# with 문에 들어갈 때 KeyPool이 키를 골라 요청하므로 429면 다른 키로 다시 보내고,
+# span과 진행 중인 요청 수는 stream이 닫힐 때까지 유지된다.
+class PooledStream:
+    def __init__(self, pool, path, args, kwargs):
+        self._pool = pool
+        self._path = path
+        self._args = args
+        self._kwargs = kwargs
+
+    def __enter__(self):
+        self._span = span("openai." + ".".join(self._path))
+        s = self._span.__enter__()
+        try:
+            self._key, self._tokens, (self._manager, stream) = self._pool._call(
+                self._path, self._args, self._kwargs, s, enter=True)
+        except BaseException:
+            self._span.__exit__(*sys.exc_info())
+            raise
+        return stream
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return self._manager.__exit__(exc_type, exc, tb)
+        finally:
+            self._pool._release(self._key, self._tokens)
+            self._span.__exit__(exc_type, exc, tb)
+
+@st.cache_resource
+def get_key_pool():
+    return KeyPool(st.secrets["api"]["keys"])
+
+def get_key_pool_size():
+    return get_key_pool().key_count
+
+def get_openai_client():
+    return get_key_pool().client
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from vectorstorecopy import copy_vector_store_files
+
+# --- 교재별 Assistant 복제 ---
+def clone_assistant(client, base_id, name, vector_store_id, metadata=None):
+    base = client.beta.assistants.retrieve(base_id)
+    return client.beta.assistants.create(
+        name=name,
+        instructions=base.instructions,
+        tools=base.tools or [],
+        model=base.model,
+        tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}},
+        metadata=metadata or {})
+
+# --- 미리 만들어 두는 교사용/학생용 Assistant + 벡터스토어 묶음 ---
+# 교재(book)마다 size개씩 준비해 두고, 교사가 "새 평가 참고자료" 모드를 선택하면 하나를 바로 꺼내 준다.
+# 꺼내 간 만큼 백그라운드에서 다시 채우고, max_idle보다 오래 쓰이지 않은 묶음은 삭제 후 새로 만든다.
+# 꺼내 준 묶음은 metadata를 "taken"으로 바꿔 두어 이후 프로세스의 정리 대상에서 빠지게 한다.
+class ResourcePool:
+    def __init__(self, client, books, size=1, max_idle=24 * 3600, refill_interval=60, claim_attempts=3):
+        self._client = client
+        self._books = books     # book -> (교사용 assistant id, 학생용 assistant id, 기본 벡터스토어 id)
+        self.size = size
+        self.max_idle = max_idle
+        self.refill_interval = refill_interval
+        self.claim_attempts = claim_attempts
+
+        self._lock = threading.Lock()
+        self._ready = {book: deque() for book in books}
+        self._wakeup = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        if size > 0:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    # 묶음을 꺼내 "taken"으로 표시한 뒤 돌려줌. 표시하지 못하면 묶음을 지우고 None (직접 만들도록)
+    def take(self, book, settingname=""):
+        with self._lock:
+            queue = self._ready.get(book)
+            entry = queue.popleft() if queue else None
+        self._wakeup.set()
+        if not entry:
+            return None
+        for attempt in range(self.claim_attempts):
+            try:
+                self._claim(entry, settingname)
+                return entry
+            except Exception:
+                if attempt + 1 < self.claim_attempts:
+                    time.sleep(2 ** attempt)
+        self._executor.submit(self._discard, entry)
+        return None
+
+    def _claim(self, entry, settingname):
+        prefix = settingname or "taken"
+        for role in ("teacher", "student"):
+            self._client.beta.assistants.update(
+                entry[role], name=f"{prefix}_{role}", metadata={"pool": "taken"})
+        self._client.beta.vector_stores.update(entry["vectorstoreid"], metadata={"pool": "taken"})
+
+    def _create(self, book):
+        teacher_id, student_id, source_id = self._books[book]
+        metadata = {"pool": "ready", "pool_created": str(int(time.time()))}
+        vectorstore = self._client.beta.vector_stores.create(name="새 벡터 스토어", metadata=metadata)
+        entry = {"vectorstoreid": vectorstore.id, "created": time.time()}
+        try:
+            copy_vector_store_files(self._client, source_id, vectorstore.id)
+            entry["teacher"] = clone_assistant(
+                self._client, teacher_id, "pool_teacher", vectorstore.id, metadata).id
+            entry["student"] = clone_assistant(
+                self._client, student_id, "pool_student", vectorstore.id, metadata).id
+        except Exception:
+            # 만들다 만 묶음은 지우고 다음 주기에 다시 시도
+            self._discard(entry)
+            raise
+        return entry
+
+    def _discard(self, entry):
+        for role in ("teacher", "student"):
+            if role not in entry:
+                continue
+            try:
+                self._client.beta.assistants.delete(entry[role])
+            except Exception:
+                pass
+        try:
+            self._client.beta.vector_stores.delete(entry["vectorstoreid"])
+        except Exception:
+            pass
+
+    def _sweep_orphans(self):
+        # 이전 프로세스가 만들어 두고 쓰지 못한 묶음 정리
+        # 꺼내 준 묶음은 건드리지 않음: "taken" 표시가 실패했더라도 이름이 pool_*에서 바뀌었거나,
+        # 정리 대상이 아닌 Assistant가 쓰고 있는 벡터스토어는 남겨 둠
+        cutoff = time.time() - self.max_idle
+        def is_orphan(item):
+            metadata = item.metadata or {}
+            return metadata.get("pool") == "ready" and int(metadata.get("pool_created", 0)) < cutoff
+
+        assistants = list(self._client.beta.assistants.list(limit=100))
+        orphans = [a for a in assistants if is_orphan(a) and a.name in ("pool_teacher", "pool_student")]
+        orphan_ids = {a.id for a in orphans}
+        in_use = set()
+        for assistant in assistants:
+            file_search = assistant.tool_resources.file_search if assistant.tool_resources else None
+            if assistant.id not in orphan_ids and file_search:
+                in_use.update(file_search.vector_store_ids or [])
+
+        for assistant in orphans:
+            self._client.beta.assistants.delete(assistant.id)
+        for vectorstore in self._client.beta.vector_stores.list(limit=100):
+            if is_orphan(vectorstore) and vectorstore.id not in in_use:
+                self._client.beta.vector_stores.delete(vectorstore.id)
+
+    def _run(self):
+        try:
+            self._sweep_orphans()
+        except Exception:
+            pass
+
+        while True:
+            cutoff = time.time() - self.max_idle
+            with self._lock:
+                expired = []
+                for queue in self._ready.values():
+                    while queue and queue[0]["created"] < cutoff:
+                        expired.append(queue.popleft())
+            for entry in expired:
+                self._discard(entry)
+
+            for book in self._books:
+                while len(self._ready[book]) < self.size:
+                    try:
+                        entry = self._create(book)
+                    except Exception:
+                        break
+                    with self._lock:
+                        self._ready[book].append(entry)
+
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
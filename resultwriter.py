@@ -0,0 +1,144 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from tracing import span
+
+# --- 학생 결과 저장 대기열 ---
+# 학생이 결과를 저장하면 먼저 로컬 파일(spool)에 기록하고 바로 응답한다.
+# 백그라운드 스레드가 같은 시트로 가는 행을 모아 append_rows 한 번으로 저장하고,
+# 실패하면 점점 간격을 늘려 다시 시도한다. 저장에 성공한 행만 spool에서 지운다.
+# 시트 주소가 비었거나 열 수 없는(권한 없음 등) 경우에는 대기열에 넣지 않고 바로 SheetUnavailableError를 낸다.
+# 저장이 끝난 행의 상태(saved/failed)는 status_ttl 동안만 status로 확인할 수 있다.
+class SheetUnavailableError(Exception):
+    pass
+
+class ResultWriter:
+    def __init__(self, open_sheet, spool_dir="result_spool", flush_interval=2.0,
+                 max_batch=100, max_attempts=8, status_ttl=3600):
+        self._open_sheet = open_sheet
+        self._spool_dir = spool_dir
+        self._failed_dir = os.path.join(spool_dir, "failed")
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.status_ttl = status_ttl
+
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)
+        self._finished_cond = threading.Condition(lock)     # 저장이 끝났음을 wait에 알림
+        self._pending = {}      # sheeturl -> [(entry_id, row), ...]
+        self._attempts = {}     # sheeturl -> 연속 실패 횟수
+        self._retry_at = {}     # sheeturl -> 다음 시도 시각
+        self._status = {}       # entry_id -> "pending" / "saved" / "failed"
+        self._finished = deque()    # (끝난 시각, entry_id), 오래된 상태를 지우는 순서
+
+        os.makedirs(self._failed_dir, exist_ok=True)
+        self._load_spool()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _spool_path(self, entry_id):
+        return os.path.join(self._spool_dir, f"{entry_id}.json")
+
+    def _load_spool(self):
+        # 서버가 재시작되기 전에 저장하지 못한 행 이어서 처리
+        for name in sorted(os.listdir(self._spool_dir)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self._spool_dir, name), encoding="utf-8") as f:
+                entry = json.load(f)
+            entry_id = name[:-5]
+            self._pending.setdefault(entry["sheeturl"], []).append((entry_id, entry["row"]))
+            self._status[entry_id] = "pending"
+
+    def submit(self, sheeturl, row):
+        if not sheeturl:
+            raise SheetUnavailableError("결과를 저장할 시트 주소가 없습니다.")
+        try:
+            self._open_sheet(sheeturl)
+        except Exception as e:
+            raise SheetUnavailableError(f"결과를 저장할 시트를 열 수 없습니다. ({e})") from e
+
+        entry_id = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+        path = self._spool_path(entry_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"sheeturl": sheeturl, "row": row}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        with self._cond:
+            self._pending.setdefault(sheeturl, []).append((entry_id, row))
+            self._status[entry_id] = "pending"
+        return entry_id
+
+    def status(self, entry_id):
+        with self._cond:
+            return self._status.get(entry_id)
+
+    # 저장이 끝나거나(saved/failed) timeout이 지날 때까지 기다린 뒤 상태를 돌려줌
+    def wait(self, entry_id, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._status.get(entry_id) == "pending":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._finished_cond.wait(remaining)
+            return self._status.get(entry_id)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # flush_interval 동안 들어온 행을 한 번에 모아서 저장
+                self._cond.wait(self.flush_interval)
+                now = time.monotonic()
+                batches = {
+                    url: entries[:self.max_batch]
+                    for url, entries in self._pending.items()
+                    if entries and self._retry_at.get(url, 0) <= now}
+
+            for url, entries in batches.items():
+                self._flush(url, entries)
+
+    def _flush(self, url, entries):
+        try:
+            with span("results.flush", rows=len(entries)):
+                self._open_sheet(url).append_rows([row for _, row in entries])
+        except Exception:
+            with self._cond:
+                attempts = self._attempts.get(url, 0) + 1
+                if attempts < self.max_attempts:
+                    self._attempts[url] = attempts
+                    self._retry_at[url] = time.monotonic() + min(60, 2 ** attempts) + random.random()
+                    return
+                # 계속 실패하는 시트(권한 없음 등)는 failed 폴더로 옮겨 두고 포기
+                self._attempts.pop(url, None)
+                self._retry_at.pop(url, None)
+                self._remove(url, entries, "failed")
+            for entry_id, _ in entries:
+                os.replace(self._spool_path(entry_id), os.path.join(self._failed_dir, f"{entry_id}.json"))
+            return
+
+        with self._cond:
+            self._attempts.pop(url, None)
+            self._retry_at.pop(url, None)
+            self._remove(url, entries, "saved")
+        for entry_id, _ in entries:
+            os.remove(self._spool_path(entry_id))
+
+    def _remove(self, url, entries, status):
+        done = {entry_id for entry_id, _ in entries}
+        self._pending[url] = [e for e in self._pending[url] if e[0] not in done]
+        if not self._pending[url]:
+            del self._pending[url]
+        now = time.monotonic()
+        for entry_id in done:
+            self._status[entry_id] = status
+            self._finished.append((now, entry_id))
+        while self._finished and self._finished[0][0] < now - self.status_ttl:
+            self._status.pop(self._finished.popleft()[1], None)
+        self._finished_cond.notify_all()
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+import streamlit as st
+from assessmentcatalog import AssessmentCatalog
+from tracing import TracingAdapter
+
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/spreadsheets"]
+
+# --- 부하 테스트용 대체 서버로 보내기 ---
+# GSPREAD_EMULATOR_HOST(예: http://127.0.0.1:8765)가 있으면 Sheets/Drive API 요청의 주소만 바꿔서 보낸다.
+# (OpenAI는 OPENAI_BASE_URL, Firebase Storage는 STORAGE_EMULATOR_HOST를 그대로 사용)
+class EmulatorAdapter(TracingAdapter):
+    def __init__(self, emulator_host, **kwargs):
+        self._target = urlsplit(emulator_host)
+        super().__init__("sheets", **kwargs)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = urlunsplit((self._target.scheme, self._target.netloc, url.path, url.query, url.fragment))
+        return super().send(request, **kwargs)
+
+# --- Google Sheets 클라이언트 (프로세스당 하나, 모든 세션이 공유) ---
+# gspread의 AuthorizedSession이 토큰 만료 전에 알아서 갱신하므로
+# 인증은 처음 시트가 필요할 때 한 번만 한다 (gspread, oauth2client도 이때 가져옴).
+@st.cache_resource
+def get_gspread_client():
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    credentials_dict = json.loads(st.secrets["gcp"]["credentials"])
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, SCOPES)
+    gc = gspread.authorize(creds)
+
+    # 여러 세션이 동시에 요청하므로 연결 풀을 넉넉하게 잡음
+    emulator_host = os.environ.get("GSPREAD_EMULATOR_HOST")
+    if emulator_host:
+        adapter = EmulatorAdapter(emulator_host, pool_connections=4, pool_maxsize=32)
+    else:
+        adapter = TracingAdapter("sheets", pool_connections=4, pool_maxsize=32)
+    gc.http_client.session.mount("https://", adapter)
+    return gc
+
+# --- 자주 여는 시트 (메타데이터 요청을 매번 보내지 않도록 캐시) ---
+@st.cache_resource(ttl=3600)
+def open_question_sheet():
+    return get_gspread_client().open(st.secrets["google"]["question"]).sheet1
+
+@st.cache_resource(ttl=3600)
+def open_result_sheet(sheeturl):
+    return get_gspread_client().open_by_url(sheeturl).get_worksheet(0)
+
+# --- 백그라운드 스레드에서 쓰는 결과 시트 열기 ---
+# st.cache_resource 함수는 ScriptRunContext가 없는 스레드에서 부르면 호출마다 경고를 남기므로,
+# 스크립트에서 만든 gspread 클라이언트와 자체 캐시(ttl 동안)를 쓴다.
+class SheetOpener:
+    def __init__(self, gc, ttl=3600):
+        self._gc = gc
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sheets = {}   # sheeturl -> (worksheet, 연 시각)
+
+    def __call__(self, sheeturl):
+        with self._lock:
+            cached = self._sheets.get(sheeturl)
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        worksheet = self._gc.open_by_url(sheeturl).get_worksheet(0)
+        with self._lock:
+            self._sheets[sheeturl] = (worksheet, time.monotonic())
+        return worksheet
+
+# --- 평가 문항 카탈로그 (settingname으로 찾기, 평가 코드 예약, 모든 세션이 공유) ---
+# 예약한 코드를 잃지 않도록 다시 만들지 않음 (시트 전체는 카탈로그가 10분마다 다시 읽음)
+@st.cache_resource
+def get_assessment_catalog():
+    return AssessmentCatalog(open_question_sheet)
@@ -1,14 +1,23 @@
 import streamlit as st
-import gspread
-import json
-import random
 import time
-from openai import OpenAI
-from oauth2client.service_account import ServiceAccountCredentials
+import queue
+import os
+import uuid
 from datetime import datetime
-import pytz
-import re
-seoul_tz = pytz.timezone("Asia/Seoul")
+from keypool import get_openai_client, get_key_pool_size
+from sheetclient import get_assessment_catalog, get_gspread_client, SheetOpener
+from resultwriter import ResultWriter, SheetUnavailableError
+from assistantrun import run_and_collect
+from feedbackcache import FeedbackCache, make_key
+from grading import (
+    build_grading_prompt, extract_score, get_partial_feedback,
+    GRADING_RESPONSE_FORMAT, build_structured_prompt, parse_structured_result,
+    format_structured_feedback, structured_sheet_feedback)
+from gradingscheduler import GradingScheduler, QueueFullError
+from chatgrading import load_assistant_profile, search_excerpts, build_reference, grade_with_chat
+from imagecache import ImageCache
+from usagemetrics import UsageMetrics
+from tracing import init_tracing, set_trace_context, span
 
 # --- 기본 세팅 ---
 st.set_page_config(page_title="(학생용)AI 서술형 평가 도우미", layout="wide")
@@ -16,33 +25,129 @@ st.caption("AI 서술형 평가 도우미: 자동채점과 맞춤형 피드백,
 st.caption("버튼 클릭, 텍스트 입력 등 동작을 요청하고 오른쪽 상단의 RUNNING 아이콘이 사라질 때까지 기다려주세요.")
 st.header(":pencil: 서술형 평가 연습하기(학생용)")
 
-api_keys = st.secrets["api"]["keys"]
-client = OpenAI(api_key=random.choice(api_keys))
+client = get_openai_client()  # 여러 API 키 중 여유 있는 키로 요청을 나눠 보냄
 
 # --- 세션 초기화 ---
 defaults = {
     "page": 0,
-    "usingthread": client.beta.threads.create().id,
     "settingname": "", "grade": "", "studentclass": "", "studentnumber": "", "studentname": "",
     "answer1": "", "answer2": "", "answer3": "",
     "feedback1": "", "feedback2": "", "feedback3": "",
     "score1": "", "score2": "", "score3": "",
     "assiapi": "", "assiapi2": "", "vectorapi" : "", 
-    "openclose": "open", "sheeturl": "", "feedbackinstruction": ""}
+    "openclose": "open", "sheeturl": "", "feedbackinstruction": "",
+    "thread_tool_resources": None, "session_id": uuid.uuid4().hex[:12]}
 
 for i in range(1, 4):
     defaults[f"question{i}"] = ""
     defaults[f"correctanswer{i}"] = ""
     defaults[f"image{i}"] = ""
+    defaults[f"usingthread{i}"] = ""
+    defaults[f"msgcursor{i}"] = ""
+    defaults[f"result{i}"] = None
 for key, val in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = val
 
+# --- 호출 추적 (이번 실행에서 남기는 span에 세션, 단계, 평가 코드를 붙임) ---
+init_tracing()
+set_trace_context(session=st.session_state["session_id"], page="student",
+                  step=st.session_state["page"] + 1, assessment=st.session_state["settingname"])
+
 # --- 페이지 전환 함수 ---
 def next_page(): st.session_state.page += 1
 def prev_page(): st.session_state.page -= 1
 def go_home(): st.session_state.page = 0
 
+# --- 결과 저장 대기열 (모든 세션이 공유) ---
+@st.cache_resource
+def get_result_writer():
+    return ResultWriter(SheetOpener(get_gspread_client()))
+
+# --- 채점 결과 캐시 (모든 세션이 공유, cache_path를 설정하면 SQLite에도 저장) ---
+@st.cache_resource
+def get_feedback_cache():
+    grading = st.secrets.get("grading", {})
+    return FeedbackCache(
+        maxsize=grading.get("cache_size", 2048),
+        ttl=grading.get("cache_ttl", 7 * 24 * 3600),
+        path=grading.get("cache_path"))
+
+# --- 문항 이미지 캐시 (모든 세션이 공유) ---
+@st.cache_resource
+def get_image_cache():
+    return ImageCache()
+
+# --- 채점 스케줄러 (모든 세션이 공유, 동시에 실행하는 run 수를 제한) ---
+# 작업 스레드는 응답을 기다리기만 하므로 API 키가 감당할 수 있는 만큼 둔다.
+# 기본값은 키 수 × per_key_workers(32): 키 3개면 96개로, 한 반(30명 × 3문항 = 90건)이 run 한 번 시간 안에 모두 시작한다.
+# 키의 rate limit이 낮으면 per_key_workers나 workers로 줄인다.
+@st.cache_resource
+def get_grading_scheduler():
+    grading = st.secrets.get("grading", {})
+    workers = grading.get("workers") or get_key_pool_size() * grading.get("per_key_workers", 32)
+    return GradingScheduler(
+        workers=workers,
+        max_queue=grading.get("max_queue", 500))
+
+# --- 채점 요청별 토큰 사용량과 프롬프트 캐시 적중 기록 (모든 세션이 공유) ---
+@st.cache_resource
+def get_usage_metrics():
+    # 합계는 항상 유지하고, 요청별 기록 파일은 [grading] metrics_path(또는 GRADING_METRICS_PATH)를 줄 때만 남김
+    path = os.environ.get("GRADING_METRICS_PATH", st.secrets.get("grading", {}).get("metrics_path"))
+    return UsageMetrics(path or None)
+
+# --- Assistant에 연결된 벡터스토어 (Assistant마다 한 번만 확인) ---
+@st.cache_data(ttl=3600)
+def assistant_vector_stores(assistant_id):
+    assistant = client.beta.assistants.retrieve(assistant_id)
+    file_search = assistant.tool_resources.file_search if assistant.tool_resources else None
+    return list(file_search.vector_store_ids or []) if file_search else []
+
+# --- Assistant의 instructions와 모델 (chat 방식 채점에서 사용, Assistant마다 한 번만 확인) ---
+@st.cache_data(ttl=3600)
+def assistant_profile(assistant_id):
+    return load_assistant_profile(client, assistant_id)
+
+# --- 문항과 관련된 교재 내용 (평가, 문항마다 한 번만 검색) ---
+@st.cache_data(ttl=3600)
+def question_excerpts(vector_store_id, question, max_results):
+    return search_excerpts(client, vector_store_id, question, max_results)
+
+# --- 채점 함수 ---
+# 한 스레드에서는 run을 하나씩만 실행할 수 있으므로 문항마다 스레드를 따로 사용
+def grade_question(thread_id, assistant_id, content, on_text=None, stream=True, tool_resources=None,
+                   cursor=None, metrics=None, tags=None, **run_options):
+    if not thread_id:
+        if tool_resources:
+            thread_id = client.beta.threads.create(tool_resources=tool_resources).id
+        else:
+            thread_id = client.beta.threads.create().id
+
+    client.beta.threads.messages.create(thread_id=thread_id, role="user", content=content)
+    started = time.monotonic()
+    run, feedback, message_id = run_and_collect(
+        client, thread_id, assistant_id,
+        on_text=on_text,
+        stream=stream,
+        cursor=cursor,
+        temperature=0.01,
+        top_p=0.01,
+        **run_options)
+    if metrics:
+        metrics.record(run.usage, time.monotonic() - started, **(tags or {}))
+    return thread_id, feedback, message_id
+
+# 스레드 없이 요청 한 번으로 채점 (반환 형식은 grade_question과 같고 스레드, 메시지 id는 비워 둠)
+def grade_question_chat(profile, content, on_text=None, stream=True, response_format=None,
+                        metrics=None, tags=None):
+    started = time.monotonic()
+    feedback, usage = grade_with_chat(
+        client, profile, content, on_text=on_text, stream=stream, response_format=response_format)
+    if metrics:
+        metrics.record(usage, time.monotonic() - started, **(tags or {}))
+    return "", feedback, ""
+
 # --- 단계별 함수 ---
 def step1():
     st.subheader("1단계. 평가 코드 입력하기")
@@ -50,28 +155,25 @@ def step1():
     code = st.text_input("평가 코드를 입력하세요")
 
     if st.button("평가 코드 확인"):
-        credentials_dict = json.loads(st.secrets["gcp"]["credentials"])
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive",
-            "https://www.googleapis.com/auth/spreadsheets"
-        ])
-        gc = gspread.authorize(creds)
-        sheet = gc.open(st.secrets["google"]["question"]).sheet1
-        data = sheet.get_all_records()
-
-        row = next((r for r in data if r.get("settingname") == code), None)
+        row = get_assessment_catalog().get(code)
         if row:
+            # 새 평가를 불러오면 이전 평가의 채점 스레드는 사용하지 않음
+            st.session_state["thread_tool_resources"] = None
+            for i in range(1, 4):
+                st.session_state[f"usingthread{i}"] = ""
+                st.session_state[f"msgcursor{i}"] = ""
             for k, v in row.items():
                 st.session_state[k] = v
 
             if st.session_state.get("assiapi2"):
                 st.session_state["assiapi"] = st.session_state["assiapi2"]
 
-                client.beta.assistants.update(
-                    assistant_id=st.session_state["assiapi"],
-                     tool_resources={"file_search": {"vector_store_ids": [st.session_state["vectorapi"]]}})
-                
+                # 공유 Assistant는 수정하지 않고, 평가의 벡터스토어가 Assistant에 연결되어 있지 않을 때만
+                # 채점용 스레드에 연결 (여러 평가를 동시에 채점해도 서로 영향을 주지 않음)
+                vectorapi = st.session_state["vectorapi"]
+                if vectorapi and vectorapi not in assistant_vector_stores(st.session_state["assiapi"]):
+                    st.session_state["thread_tool_resources"] = {"file_search": {"vector_store_ids": [vectorapi]}}
+
             st.success("평가를 성공적으로 불러왔습니다.")
 
         else:
@@ -145,7 +247,8 @@ def step3():
 
             img = st.session_state.get(f"image{i}", "")
             if img:
-                st.image(img, caption=f"{i}번 문항 이미지", width=300)
+                # 서버에 캐시해 둔 이미지를 보여주고, 받아오지 못하면 원래 주소 사용
+                st.image(get_image_cache().get(img) or img, caption=f"{i}번 문항 이미지", width=300)
 
             answer = st.text_area(f"{i}번 문항 답안", value=st.session_state[f"answer{i}"], key=f"answer_input_{i}")
 
@@ -170,47 +273,175 @@ def step4():
     st.subheader("4단계. 채점 결과 및 피드백 확인하기")
     tabs = st.tabs(["1번 피드백", "2번 피드백", "3번 피드백"])
 
-    def extract_score(text):
-        match = re.search(r"(\d+)\s*점", text)
-        return int(match.group(1)) if match else None    
-
     if st.button("채점 결과 및 피드백 확인"):
         st.session_state["openclose"] = "close"
+        assistant_id = st.session_state["assiapi"] or "asst_x2x5kNPZ5zgwj1YV9iY8E7UC"
+        grading = st.secrets.get("grading", {})
+        stream = grading.get("stream", True)
+
+        # 다시 채점할수록 스레드 기록이 길어지지 않도록 문맥 관리
+        # - window: 문항별 스레드를 유지하되 최근 context_window개 메시지만 읽게 함 (기본)
+        # - fresh: 채점할 때마다 새 스레드 사용
+        # - question: 문항별 스레드의 전체 기록 사용 (이전 방식)
+        context = grading.get("context", "window")
+        run_options = {}
+        if context == "window":
+            run_options["truncation_strategy"] = {
+                "type": "last_messages", "last_messages": grading.get("context_window", 1)}
+
+        # json: 점수, 채점 이유, 피드백을 JSON 필드로 따로 받음 / text: 자유 형식 피드백에서 점수를 찾음 (기본)
+        output = grading.get("output", "text")
+        if output == "json":
+            run_options["response_format"] = GRADING_RESPONSE_FORMAT
+
+        # assistants: 문항별 스레드에서 Assistant run으로 채점 (기본)
+        # chat: 스레드 없이 Chat Completions 요청 한 번으로 채점, excerpts개만큼 교재 내용을 미리 찾아 넣음
+        backend = grading.get("backend", "assistants")
+        if backend == "chat":
+            profile = assistant_profile(assistant_id)
+            max_excerpts = grading.get("excerpts", 0)
+            vector_store_id = st.session_state["vectorapi"] or next(iter(assistant_vector_stores(assistant_id)), "")
+
+        def save_result(i, raw):
+            q, a = st.session_state[f"question{i}"], st.session_state[f"answer{i}"]
+            if output == "json":
+                result = parse_structured_result(raw)
+                st.session_state[f"result{i}"] = result
+                st.session_state[f"feedback{i}"] = format_structured_feedback(q, a, result)
+                st.session_state[f"score{i}"] = result["score"]
+            else:
+                st.session_state[f"result{i}"] = None
+                st.session_state[f"feedback{i}"] = raw
+                st.session_state[f"score{i}"] = extract_score(raw)
+
+        updates = queue.Queue()
+        placeholders = {}
+        cache = get_feedback_cache()
+        cache_keys = {}
+
+        # 채점이 끝나면 작업 스레드에서 바로 캐시에 저장 (학생이 기다리다 나가도 다음 요청에서 사용)
+        def cache_when_done(key):
+            def done(future):
+                if future.cancelled() or future.exception():
+                    return
+                feedback = future.result()[1]
+                score = parse_structured_result(feedback)["score"] if output == "json" else extract_score(feedback)
+                cache.put(key, feedback, score)
+            return done
+
+        # 문항마다 따로 채점 요청을 공유 스케줄러에 넣어 동시에 채점 (세션 상태는 메인 스크립트에서만 갱신)
+        scheduler = get_grading_scheduler()
+        group = (st.session_state["settingname"], st.session_state["grade"], st.session_state["studentclass"])
+        jobs = {}
         for i in range(1, 4):
             q = st.session_state[f"question{i}"]
             a = st.session_state[f"answer{i}"]
             instructions = st.session_state["feedbackinstruction"]
             if not a: continue
 
-            client.beta.threads.messages.create(
-                thread_id=st.session_state["usingthread"],
-                role="user",
-                content = f"""
-{i}번 문항에 대해 학생의 답안을 채점하고, 
-** instructions에 따라 1~5문단 형식으로 피드백을 작성해주세요.
-** instructions에 나와 있는 대로 생성합니다. 
-instructions에 따르면 채점 결과에 따라 생성하는 피드백의 내용이 달라지므로 꼭 확인하세요. 
-문항, 학생이 입력한 답안, 채점 결과(점수+이유), 피드백 내용(점수에 따라 피드백 형식이 달라짐)을 각각 서로 다른 문단으로 나눠서 읽기 쉽게 보여주세요.
-
-평가 주의 사항: {instructions}
-문항: {q}
-학생 답안: {a}
-"""
-
-            )
-            run = client.beta.threads.runs.create(
-                thread_id=st.session_state["usingthread"],
-                assistant_id=st.session_state["assiapi"] or "asst_x2x5kNPZ5zgwj1YV9iY8E7UC",
-                temperature=0.01,
-                top_p=0.01)
-            
-            while client.beta.threads.runs.retrieve(run_id=run.id, thread_id=st.session_state["usingthread"]).status != "completed":
-                time.sleep(2)
-
-            msg = client.beta.threads.messages.list(st.session_state["usingthread"])
-            feedback = msg.data[0].content[0].text.value.strip()
-            st.session_state[f"feedback{i}"] = feedback
-            st.session_state[f"score{i}"] = extract_score(feedback)
+            # 같은 답안을 이미 채점한 적이 있으면 run 없이 저장된 결과 사용
+            cache_keys[i] = make_key(st.session_state["settingname"], q, instructions, a, output, backend)
+            cached = cache.get(cache_keys[i])
+            if cached:
+                save_result(i, cached[0])
+                continue
+
+            # 이전 실행에서 넣은 같은 문항의 작업이 남아 있으면, 같은 답안이면 이어서 기다리고
+            # 다른 답안이면 대기 중인 작업은 취소, 이미 실행 중이면 그 스레드는 쓰지 않음 (run이 끝나지 않은 스레드)
+            job_key = (st.session_state["session_id"], i)
+            previous = scheduler.active(job_key)
+            if previous and previous.fingerprint == cache_keys[i]:
+                jobs[i] = previous
+                placeholders[i] = tabs[i - 1].empty()
+                placeholders[i].info("채점 중입니다...")
+                continue
+            busy_thread = bool(previous) and not scheduler.cancel(previous)
+
+            # 평가, 문항마다 같은 앞부분 뒤에 답안을 붙임 (프롬프트 캐시 적중은 metrics에 기록)
+            build_prompt = build_structured_prompt if output == "json" else build_grading_prompt
+            tags = {"backend": backend, "settingname": st.session_state["settingname"], "question": i}
+            on_text = None if output == "json" else (lambda delta, i=i: updates.put((i, delta)))
+            try:
+                if backend == "chat":
+                    excerpts = []
+                    if max_excerpts and vector_store_id:
+                        # 검색에 실패하면 이번에는 교재 내용 없이 채점 (실패는 캐시되지 않으므로 다음 요청에서 다시 검색)
+                        try:
+                            excerpts = question_excerpts(vector_store_id, q, max_excerpts)
+                        except Exception:
+                            excerpts = []
+                    reference = build_reference(st.session_state[f"correctanswer{i}"], excerpts)
+                    jobs[i] = scheduler.submit(
+                        group, grade_question_chat, profile,
+                        build_prompt(i, q, a, instructions, reference),
+                        on_text=on_text,
+                        stream=stream,
+                        response_format=run_options.get("response_format"),
+                        metrics=get_usage_metrics(),
+                        tags=tags,
+                        job_key=job_key, fingerprint=cache_keys[i])
+                else:
+                    thread_id = "" if context == "fresh" or busy_thread else st.session_state[f"usingthread{i}"]
+                    jobs[i] = scheduler.submit(
+                        group, grade_question, thread_id, assistant_id,
+                        build_prompt(i, q, a, instructions),
+                        on_text=on_text,
+                        stream=stream,
+                        tool_resources=st.session_state["thread_tool_resources"],
+                        cursor=st.session_state[f"msgcursor{i}"] if thread_id else "",
+                        metrics=get_usage_metrics(),
+                        tags=tags,
+                        job_key=job_key, fingerprint=cache_keys[i],
+                        **run_options)
+            except QueueFullError:
+                st.warning("지금 채점 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+                break
+            jobs[i].future.add_done_callback(cache_when_done(cache_keys[i]))
+            placeholders[i] = tabs[i - 1].empty()
+            if output == "json":
+                placeholders[i].info("채점 중입니다...")
+
+        # 대기 순서를 보여주고, 생성되는 피드백을 문항별 탭에 바로 보여주기
+        status = st.empty()
+        partial = {i: "" for i in jobs}
+        try:
+            while True:
+                finished = all(job.future.done() for job in jobs.values())
+                waiting = [scheduler.position(job) for job in jobs.values()]
+                waiting = [position for position in waiting if position is not None]
+                if waiting:
+                    eta = max(scheduler.eta(job) for job in jobs.values())
+                    status.info(f"채점 순서를 기다리고 있습니다. 앞에 {min(waiting)}개의 답안이 있습니다. (예상 대기 시간: 약 {int(eta)}초)")
+                else:
+                    status.empty()
+
+                changed = set()
+                while not updates.empty():
+                    i, delta = updates.get()
+                    partial[i] += delta
+                    changed.add(i)
+                for i in changed:
+                    placeholders[i].markdown(partial[i])
+                if finished:
+                    break
+                time.sleep(0.2)
+        except BaseException:
+            # 기다리는 중에 다시 실행되거나 학생이 나가면 아직 시작하지 않은 작업은 취소
+            # (실행 중인 작업은 끝나면 캐시에 저장되고, 같은 답안으로 다시 요청하면 이어서 기다림)
+            for job in jobs.values():
+                scheduler.cancel(job)
+            raise
+
+        for i, job in jobs.items():
+            placeholders[i].empty()
+            try:
+                thread_id, feedback, message_id = job.future.result()
+            except Exception as e:
+                st.error(f"{i}번 문항 채점 중 오류가 발생했습니다. 다시 시도해주세요. ({e})")
+                continue
+            st.session_state[f"usingthread{i}"] = thread_id
+            st.session_state[f"msgcursor{i}"] = message_id
+            save_result(i, feedback)
 
     for i, tab in enumerate(tabs, start=1):
         with tab:
@@ -231,46 +462,57 @@ instructions에 따르면 채점 결과에 따라 생성하는 피드백의 내
 def step5():
     st.subheader("5단계. 결과 저장하기")
 
-    def get_partial_feedback(text):
-        paragraphs = re.split(r'\n{2,}', text.strip())
-        return "\n\n".join(paragraphs[2:]) if len(paragraphs) >= 3 else text
+    # 구조화된 결과가 있으면 채점 결과와 피드백만, 없으면 피드백 앞의 문항/답안 문단을 빼고 저장
+    def saved_feedback(i):
+        result = st.session_state.get(f"result{i}")
+        if result:
+            return structured_sheet_feedback(result)
+        return get_partial_feedback(st.session_state[f"feedback{i}"])
 
+    writer = get_result_writer()
+    status = None
     if st.button("결과 저장"):
-        credentials_dict = json.loads(st.secrets["gcp"]["credentials"])
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive",
-            "https://www.googleapis.com/auth/spreadsheets"
-        ])
-        gc = gspread.authorize(creds)
-        spreadsheet = gc.open_by_url(st.session_state["sheeturl"])
-        worksheet = spreadsheet.get_worksheet(0)
-
-        worksheet.append_row([
-            datetime.now(seoul_tz).strftime("%Y-%m-%d %H:%M:%S"),
-            st.session_state["settingname"],
-            st.session_state["grade"],
-            st.session_state["studentclass"],
-            st.session_state["studentnumber"],
-            st.session_state["studentname"],
-
-            st.session_state["question1"],
-            st.session_state["score1"],
-            st.session_state["answer1"],
-            get_partial_feedback(st.session_state["feedback1"]),
-
-            st.session_state["question2"],
-            st.session_state["score2"],
-            st.session_state["answer2"],
-            get_partial_feedback(st.session_state["feedback2"]),
-
-            st.session_state["question3"],
-            st.session_state["score3"],
-            st.session_state["answer3"],
-            get_partial_feedback(st.session_state["feedback3"])
-        ])
-
-        st.success("저장 완료!")
+        import pytz
+        # 시트를 열 수 있는지 확인한 뒤 대기열에 넣고, 백그라운드에서 모아서 저장
+        try:
+            st.session_state["result_entry"] = writer.submit(st.session_state["sheeturl"], [
+                datetime.now(pytz.timezone("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S"),
+                st.session_state["settingname"],
+                st.session_state["grade"],
+                st.session_state["studentclass"],
+                st.session_state["studentnumber"],
+                st.session_state["studentname"],
+
+                st.session_state["question1"],
+                st.session_state["score1"],
+                st.session_state["answer1"],
+                saved_feedback(1),
+
+                st.session_state["question2"],
+                st.session_state["score2"],
+                st.session_state["answer2"],
+                saved_feedback(2),
+
+                st.session_state["question3"],
+                st.session_state["score3"],
+                st.session_state["answer3"],
+                saved_feedback(3)
+            ])
+            # 저장을 누른 이번 실행에서만 잠깐 기다려 봄 (시트가 느려도 학생을 오래 붙잡지 않음)
+            status = writer.wait(st.session_state["result_entry"], timeout=2)
+        except SheetUnavailableError as e:
+            st.error(f"{e} 선생님께 평가 시트 주소와 공유 설정을 확인해 달라고 해주세요.")
+
+    # 저장 결과 확인 (다시 실행될 때는 기다리지 않고 지금 상태만 보여줌)
+    entry_id = st.session_state.get("result_entry")
+    if entry_id:
+        status = status or writer.status(entry_id)
+        if status == "saved":
+            st.success("저장 완료!")
+        elif status == "failed":
+            st.error("결과를 시트에 저장하지 못했습니다. 선생님께 평가 시트의 공유 설정을 확인해 달라고 해주세요.")
+        elif status == "pending":
+            st.info("저장 중입니다. 잠시 후 자동으로 시트에 저장됩니다.")
 
     st.write("---")
     col1, col2, col3 = st.columns([1, 1, 3])
@@ -294,4 +536,5 @@ tabs = st.tabs([
 
 # --- 페이지 전환 제어 ---
 pages = [step1, step2, step3, step4, step5]
-pages[st.session_state["page"]]()
\ No newline at end of file
+with span("student.step"):
+    pages[st.session_state["page"]]()
\ No newline at end of file
@@ -1,27 +1,22 @@
 import streamlit as st
-import openai
-import time
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
-import pytz
-import random
-import json
-import firebase_admin
-from firebase_admin import storage, credentials
+import hashlib
+import io
 import uuid
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 import streamlit.components.v1 as components
-seoul_tz = pytz.timezone("Asia/Seoul")
-
-# --- API 및 초기 설정 ---
-api_keys = st.secrets["api"]["keys"]
-selected_api_key = random.choice(api_keys)
-client = openai.OpenAI(api_key=selected_api_key)
-assistant_id = 'asst_2FrZmOonHQCPO6EhXzQ6u3nr'
-new_thread = client.beta.threads.create()
-
-# --- streamlit 페이지 설정 ---
+from keypool import get_openai_client
+from sheetclient import open_result_sheet, get_assessment_catalog
+from assistantrun import run_and_collect, RunFailedError
+from vectorstorecopy import copy_vector_store_files
+from resourcepool import ResourcePool, clone_assistant
+from batchgrading import submit_batch, apply_batch
+from tracing import init_tracing, set_trace_context, span
+
+# --- streamlit 페이지 설정 (다른 streamlit 명령보다 먼저 호출) ---
 st.set_page_config(page_title="(교사용)AI 서술형 평가 도우미", layout="wide")
+
 st.caption("AI 서술형 평가 도우미: 자동채점과 맞춤형 피드백, 4학년")
 st.caption("버튼 클릭, 텍스트 입력 등 동작을 요청하고 오른쪽 상단의 running 아이콘이 사라질 때까지 기다려주세요.")
 
@@ -29,6 +24,11 @@ st.markdown("[:file_folder: 이미 만들어진 평가 문항 확인하기]"
         "(https://docs.google.com/spreadsheets/d/1XBk1XWCroe74WgU6guZKOk7s0UtfgOvfNPY0QU-HoWM/edit?gid=0#gid=0)")
 st.header(':memo:서술형 평가 설계하기(교사용)')
 
+# --- API 및 초기 설정 ---
+# 클라이언트는 모두 cache_resource로 한 번만 만들고, 네트워크 요청은 각 단계에서 필요할 때 보낸다.
+client = get_openai_client()  # 여러 API 키 중 여유 있는 키로 요청을 나눠 보냄
+assistant_id = 'asst_2FrZmOonHQCPO6EhXzQ6u3nr'
+
 # --- 세션 초기화 ---
 defaults = {
     'settingname': '', 'grade': '', 'subject': '', 'publisher': '',
@@ -36,44 +36,86 @@ defaults = {
     'correctanswer1': '', 'correctanswer2': '', 'correctanswer3': '',
     'image1': '', 'image2': '', 'image3': '',
     'feedbackinstruction': '', 'vectorstoreid': '', 'assiapi': '', 'assiapi2': '',
-    'usingthread': new_thread.id, 'new_resources_initialized': False}
+    'usingthread': '', 'msgcursor': '', 'new_resources_initialized': False,
+    # 새로고침해도 같은 교사로 보도록 id를 주소(?sid=)에 남김 (평가 코드 예약에 사용)
+    'session_id': st.query_params.get('sid') or uuid.uuid4().hex[:12]}
 
 for key, val in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = val
-
-# --- firebase 초기화 ---
-if not firebase_admin._apps:
-    firebase_secret = dict(st.secrets["firebase"])
-    cred = credentials.Certificate(firebase_secret)
-    firebase_admin.initialize_app(cred, {
-        "storageBucket": "openendedquestion-60aee.firebasestorage.app"
-    })
+if st.query_params.get('sid') != st.session_state['session_id']:
+    st.query_params['sid'] = st.session_state['session_id']
+
+# --- 호출 추적 (이번 실행에서 남기는 span에 세션과 평가 코드를 붙임) ---
+init_tracing()
+set_trace_context(session=st.session_state['session_id'], page="teacher",
+                  assessment=st.session_state['settingname'])
+
+# --- firebase 초기화 (처음 이미지를 올릴 때 프로세스당 한 번) ---
+@st.cache_resource
+def get_storage_bucket():
+    import firebase_admin
+    from firebase_admin import storage, credentials
+    if not firebase_admin._apps:
+        firebase_secret = dict(st.secrets["firebase"])
+        cred = credentials.Certificate(firebase_secret)
+        firebase_admin.initialize_app(cred, {
+            "storageBucket": "openendedquestion-60aee.firebasestorage.app"
+        })
+    return storage.bucket()
 
 # --- firebase 함수 설정 ---
-def upload_image_to_firebase(file, filename_prefix="img"):
-    bucket = storage.bucket()
-    ext = file.name.split(".")[-1]
-    unique_name = f"{filename_prefix}_{uuid.uuid4()}.{ext}"
-    blob = bucket.blob(unique_name)
-    blob.upload_from_file(file, content_type=file.type)
-    blob.make_public()
-    return blob.public_url
-
-# --- Google Sheets 설정 ---
-credentials_dict = json.loads(st.secrets["gcp"]["credentials"])
-credentials = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive",
-    "https://www.googleapis.com/auth/spreadsheets"])
-gc = gspread.authorize(credentials)
-spreadsheet = gc.open(st.secrets["google"]["question"])
-worksheet = spreadsheet.sheet1
+# 학생 화면에는 가로 300px로만 보여주므로 300px WebP 이미지를 원본 옆에 함께 저장
+def make_web_image(data, width=300):
+    from PIL import Image, ImageOps
+    img = Image.open(io.BytesIO(data))
+    img = ImageOps.exif_transpose(img)     # 휴대폰 사진의 회전 정보(EXIF)를 실제 방향으로 적용
+    # 투명색이 지정된 팔레트 이미지(GIF, PNG-8 등)도 투명도를 유지
+    has_alpha = "A" in img.getbands() or "transparency" in img.info
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    img.thumbnail((width, width * 10))
+    out = io.BytesIO()
+    img.save(out, format="WEBP", quality=80)
+    return out.getvalue()
+
+# 같은 이미지는 내용 해시로 같은 파일 이름이 되므로, 이미 올라가 있으면 업로드하지 않음
+# bucket은 스크립트 스레드에서 get_storage_bucket()으로 받아 넘김 (업로드 스레드에서 cache_resource를 부르지 않음)
+def upload_image_to_firebase(bucket, data, filename, content_type):
+    with span("firebase.upload_image", bytes=len(data)) as s:
+        digest = hashlib.sha256(data).hexdigest()
+        ext = filename.split(".")[-1].lower()
+        web_blob = bucket.blob(f"images/{digest}_w300.webp")
+        uploaded = not web_blob.exists()
+        if uploaded:
+            original_blob = bucket.blob(f"images/{digest}.{ext}")
+            original_blob.upload_from_string(data, content_type=content_type)
+            original_blob.make_public()
+            web_blob.upload_from_string(make_web_image(data), content_type="image/webp")
+            web_blob.make_public()
+        s.set(uploaded=uploaded)
+        return web_blob.public_url
+
+# --- 교재별 Assistant/벡터스토어 미리 준비 (모든 세션이 공유) ---
+@st.cache_resource
+def get_resource_pool():
+    assistant_secret = st.secrets["assistants"]
+    vectorstore_secret = st.secrets["vectorstores"]
+    books = {
+        book: (assistant_secret[f"{book}_teacher"], assistant_secret[f"{book}_student"], vectorstore_id)
+        for book, vectorstore_id in vectorstore_secret.items()
+        if f"{book}_teacher" in assistant_secret and f"{book}_student" in assistant_secret}
+    pool_secret = st.secrets.get("pool", {})
+    return ResourcePool(
+        get_openai_client(), books,
+        size=pool_secret.get("size", 1),
+        max_idle=pool_secret.get("max_idle", 24 * 3600))
 
 # --- 함수들 ---
-def is_code_duplicate(settingname):
-    codes = worksheet.col_values(2)
-    return settingname in codes
+def get_thread():
+    # 스레드는 처음 필요할 때 한 번만 생성 (재실행마다 만들지 않음)
+    if not st.session_state['usingthread']:
+        st.session_state['usingthread'] = client.beta.threads.create().id
+    return st.session_state['usingthread']
 
 def step1():
     st.subheader("1단계. 평가 코드 만들기")
@@ -82,7 +124,8 @@ def step1():
         if st.button("평가 코드 등록"):
             if not settingname or settingname.isdigit():
                 st.error("평가 코드에는 문자가 반드시 포함되어야 합니다. 숫자로만 이루어진 평가 코드는 사용할 수 없습니다.")
-            elif is_code_duplicate(settingname):
+            # 시트에 저장된 코드와 다른 교사가 등록 중인 코드를 모두 확인하고, 이 세션 몫으로 잡아 둠
+            elif not get_assessment_catalog().reserve(settingname, st.session_state['session_id']):
                 st.error("이미 존재하는 평가 코드입니다.")
             else:
                 st.session_state['settingname'] = settingname
@@ -114,6 +157,7 @@ def step2():
                 st.session_state['assiapi'] = assistant_secret["grade4_social_visang_teacher"]
                 st.session_state['assiapi2'] = assistant_secret["grade4_social_visang_student"]
                 st.session_state['default_vectorstore_id'] = vectorstore_secret["grade4_social_visang"]
+                st.session_state['textbook'] = "grade4_social_visang"
 
             # if grade == "4학년 1학기" and subject == "과학" and publisher == "아이스크림미디어":
             #     st.session_state['assiapi'] = assistant_secret["grade4_science_icmedia_teacher"]
@@ -124,14 +168,19 @@ def step2():
                 st.session_state['assiapi'] = assistant_secret["grade4_science_chunjae_teacher"]
                 st.session_state['assiapi2'] = assistant_secret["grade4_science_chunjae_student"]
                 st.session_state['default_vectorstore_id'] = vectorstore_secret["grade4_science_chunjae"]
+                st.session_state['textbook'] = "grade4_science_chunjae"
 
             if grade == "5학년 2학기" and subject == "사회" and publisher == "천재교과서/천재교육":
                 st.session_state['assiapi'] = assistant_secret["grade5_social_chunjae_teacher"]
                 st.session_state['assiapi2'] = assistant_secret["grade5_social_chunjae_student"]
                 st.session_state['default_vectorstore_id'] = vectorstore_secret["grade5_social_chunjae"]
+                st.session_state['textbook'] = "grade5_social_chunjae"
             
             st.success("선택이 저장되었습니다.")
 
+            # 3단계에서 새 자료를 고를 때 바로 쓸 수 있도록 이때부터 백그라운드에서 채우기 시작
+            get_resource_pool()
+
 def step3():
     st.subheader("3단계. 평가 참고자료 입력하기")
 
@@ -159,7 +208,17 @@ def step3():
         elif mode == "new":
             st.success("추가로 평가 참고자료를 업로드하여 평가에 활용합니다.")
 
-            # 1. 새 벡터스토어 생성
+            # 1. 미리 만들어 둔 Assistant/벡터스토어 묶음이 있으면 바로 사용
+            if not st.session_state.get('new_resources', False):
+                entry = get_resource_pool().take(
+                    st.session_state.get('textbook', ''), st.session_state['settingname'])
+                if entry:
+                    st.session_state['vectorstoreid'] = entry['vectorstoreid']
+                    st.session_state['assiapi'] = entry['teacher']
+                    st.session_state['assiapi2'] = entry['student']
+                    st.session_state['new_resources'] = True
+
+            # 준비된 묶음이 없으면 직접 생성
             if not st.session_state.get('new_resources', False):
 
                 new_vectorstore = client.beta.vector_stores.create(name="새 벡터 스토어")
@@ -167,45 +226,38 @@ def step3():
 
                 # 2. 교사용 Assistant 복제
                 try:
-                    base_teacher = client.beta.assistants.retrieve(st.session_state['assiapi'])
-                    new_teacher = client.beta.assistants.create(
-                        name=f"{st.session_state['settingname']}_teacher",
-                        instructions=base_teacher.instructions,
-                        tools=base_teacher.tools or [],
-                        model=base_teacher.model,
-                        tool_resources={"file_search": {"vector_store_ids": [new_vectorstore.id]}}
-                    )
+                    new_teacher = clone_assistant(
+                        client, st.session_state['assiapi'],
+                        f"{st.session_state['settingname']}_teacher", new_vectorstore.id)
                     st.session_state['assiapi'] = new_teacher.id
                 except Exception as e:
                     return
 
                 # 3. 학생용 Assistant 복제
                 try:
-                    base_student = client.beta.assistants.retrieve(st.session_state['assiapi2'])
-                    new_student = client.beta.assistants.create(
-                        name=f"{st.session_state['settingname']}_student",
-                        instructions=base_student.instructions,
-                        tools=base_student.tools or [],
-                        model=base_student.model,
-                        tool_resources={"file_search": {"vector_store_ids": [new_vectorstore.id]}}
-                    )
+                    new_student = clone_assistant(
+                        client, st.session_state['assiapi2'],
+                        f"{st.session_state['settingname']}_student", new_vectorstore.id)
                     st.session_state['assiapi2'] = new_student.id
                 except Exception as e:
                     return
 
-                # 4. 기존 벡터스토어에서 파일 복사
+                # 4. 기존 벡터스토어에서 파일 복사 (file batch로 한 번에)
                 try:
-                    source_files = client.beta.vector_stores.files.list(
-                        vector_store_id=st.session_state['default_vectorstore_id']
-                    )
-                    if hasattr(source_files, 'data'):
-                        for file in source_files.data:
-                            client.beta.vector_stores.files.create(
-                                vector_store_id=st.session_state['vectorstoreid'],
-                                file_id=file.id
-                            )
-                            time.sleep(1)
-                        st.session_state['new_resources'] = True    
+                    progress = st.progress(0.0, text="기존 평가 참고자료를 복사하는 중입니다.")
+                    def show_progress(done, total):
+                        progress.progress(done / total if total else 1.0,
+                                          text=f"기존 평가 참고자료를 복사하는 중입니다. ({done}/{total})")
+
+                    total, failed = copy_vector_store_files(
+                        client,
+                        st.session_state['default_vectorstore_id'],
+                        st.session_state['vectorstoreid'],
+                        on_progress=show_progress)
+                    progress.empty()
+                    if failed:
+                        st.warning(f"{total}개 중 {failed}개 파일을 복사하지 못했습니다.")
+                    st.session_state['new_resources'] = True
                 except Exception as e:
                     st.warning(f"파일 복사 중 오류: {e}")
 
@@ -244,14 +296,16 @@ def step4():
 
         if st.button("문항 등록"):
 
-             # 이미지 업로드 → URL만 추출
-            image_url = []
-            for idx, image in enumerate([image1, image2, image3], start=1):
-                if image:
-                    url = upload_image_to_firebase(image, f"q{idx}")
-                else:
-                    url = ""
-                image_url.append(url)
+            # 이미지 업로드 → URL만 추출 (세 이미지를 동시에 업로드, 추적 태그는 각 스레드로 넘김)
+            images = [image1, image2, image3]
+            bucket = get_storage_bucket() if any(images) else None
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run,
+                                    upload_image_to_firebase, bucket, image.getvalue(), image.name, image.type)
+                    if image else None
+                    for image in images]
+                image_url = [future.result() if future else "" for future in futures]
 
             # 세션 상태에 모두 저장
             st.session_state.update({
@@ -275,8 +329,9 @@ def step6():
     with st.container(border=True):
         st.caption("평가 내용 확인하기")
         if st.button("평가 내용 확인"):
+            thread_id = get_thread()
             client.beta.threads.messages.create(
-                thread_id=st.session_state['usingthread'],
+                thread_id=thread_id,
                 role="user",
                 content=f"""평가 문항 및 모범 답안 등록:
     1번 문항: {st.session_state['question1']}
@@ -294,29 +349,30 @@ def step6():
 
     """)
             client.beta.threads.messages.create(
-                thread_id=st.session_state['usingthread'],
+                thread_id=thread_id,
                 role="user",
                 content=f"평가 주의 사항: {st.session_state['feedbackinstruction']}")
             client.beta.threads.messages.create(
-                thread_id=st.session_state['usingthread'],
+                thread_id=thread_id,
                 role="user",
                 content="입력한 평가 정보를 모두 요약해서 보여줘. 입력한 문항에 대해서만 보여줘. 파일에서 모범 답안이 필요한 경우, 벡터스토어를 사용해서 생성해줘. 1번 문항: ~ 보여주고, 문단 바꿔서 1번 모범 답안: ~ 해서 보여줘.")
-            run = client.beta.threads.runs.create(
-                thread_id=st.session_state['usingthread'],
-                assistant_id=st.session_state['assiapi'],
-                temperature=0.01,
-                top_p=0.01)
-            
-            while True:
-                result = client.beta.threads.runs.retrieve(
-                    thread_id=st.session_state['usingthread'],
-                    run_id=run.id)
-                if result.status == "completed":
-                    break
-                time.sleep(2)
-
-            thread_messages = client.beta.threads.messages.list(st.session_state['usingthread'])
-            st.write(thread_messages.data[0].content[0].text.value)
+            placeholder = st.empty()
+            partial = []
+            def show_partial(delta):
+                partial.append(delta)
+                placeholder.markdown("".join(partial))
+
+            try:
+                run, summary, st.session_state['msgcursor'] = run_and_collect(
+                    client, thread_id, st.session_state['assiapi'],
+                    on_text=show_partial,
+                    stream=st.secrets.get("grading", {}).get("stream", True),
+                    cursor=st.session_state['msgcursor'],
+                    temperature=0.01,
+                    top_p=0.01)
+                placeholder.write(summary)
+            except (RunFailedError, TimeoutError) as e:
+                placeholder.error(f"평가 내용을 불러오지 못했습니다. 다시 시도해주세요. ({e})")
 
             st.markdown("#### 업로드한 문항 이미지")
             for i in range(1, 4):
@@ -342,8 +398,10 @@ def step6():
         st.markdown("---")
 
         if st.button("서술형 평가 저장"):
-            now = datetime.now(seoul_tz).strftime("%Y-%m-%d %H:%M:%S")
-            worksheet.append_row([
+            import pytz
+            now = datetime.now(pytz.timezone("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+            saved = st.session_state['settingname'] and get_assessment_catalog().register(
+                st.session_state['settingname'], st.session_state['session_id'], [
                 now, 
                 st.session_state['settingname'],
                 st.session_state['question1'], st.session_state['question2'], st.session_state['question3'],
@@ -353,11 +411,72 @@ def step6():
                 st.session_state['assiapi2'],
                 st.session_state['vectorstoreid'],
                 st.session_state['sheeturl']])
-            st.success("최종적으로 서술형 평가 문항 시트에 저장하였습니다.")
+            if saved:
+                st.session_state['saved_settingname'] = st.session_state['settingname']
+                st.success("최종적으로 서술형 평가 문항 시트에 저장하였습니다.")
+            elif not st.session_state['settingname']:
+                st.error("1단계에서 평가 코드를 먼저 등록해주세요.")
+            elif st.session_state.get('saved_settingname') == st.session_state['settingname']:
+                st.info("이미 저장된 평가입니다.")
+            else:
+                st.error("다른 선생님이 같은 평가 코드를 먼저 저장했습니다. 1단계에서 평가 코드를 다시 만들어주세요.")
 
             if not sheet_url:
                 st.error("구글 시트 사본 url을 입력해주세요.")
 
+    # 학생 답안 일괄 채점 (Batch API)
+    with st.container(border=True):
+        st.caption("학생 답안 한꺼번에 채점하기")
+        st.write("채점하지 않고 저장된 학생 답안을 모아서 한 번에 채점합니다. 채점 결과는 최대 24시간 안에 구글 시트 사본에 반영됩니다.")
+        if st.button("일괄 채점 요청"):
+            if not st.session_state.get('sheeturl'):
+                st.error("구글 시트 사본 url을 입력해주세요.")
+            else:
+                try:
+                    batch = submit_batch(
+                        client, open_result_sheet(st.session_state['sheeturl']),
+                        get_assessment_catalog().get, "asst_x2x5kNPZ5zgwj1YV9iY8E7UC")
+                except Exception as e:
+                    st.error(f"일괄 채점을 요청하지 못했습니다. 시트 주소와 공유 권한을 확인하고 다시 시도해주세요. ({e})")
+                    return
+                if batch:
+                    st.session_state['batch_id'] = batch.id
+                    st.success(f"일괄 채점을 요청했습니다. 작업 번호: {batch.id}")
+                else:
+                    st.info("채점할 학생 답안이 없습니다. (이미 일괄 채점을 요청한 답안은 제외)")
+
+        batch_id = st.text_input("일괄 채점 작업 번호", st.session_state.get('batch_id', ''))
+        if st.button("일괄 채점 결과 반영") and batch_id:
+            if not st.session_state.get('sheeturl'):
+                st.error("구글 시트 사본 url을 입력해주세요.")
+                return
+            try:
+                status, applied = apply_batch(client, open_result_sheet(st.session_state['sheeturl']), batch_id)
+            except Exception as e:
+                st.error(f"일괄 채점 결과를 반영하지 못했습니다. 작업 번호와 시트 주소를 확인하고 다시 시도해주세요. ({e})")
+                return
+            if status == "completed":
+                st.success(f"{applied}개 답안의 채점 결과를 반영했습니다.")
+            elif status in ("failed", "expired", "cancelled"):
+                st.error(f"일괄 채점이 완료되지 못했습니다. ({status})")
+            else:
+                st.info(f"아직 채점 중입니다. 잠시 후 다시 확인해주세요. ({status})")
+
+# --- 단계별 부분 실행 ---
+# 각 단계를 fragment로 감싸서, 한 단계의 위젯을 조작하면 그 단계만 다시 실행한다.
+# (streamlit 1.37부터 st.fragment, 그 전에는 st.experimental_fragment)
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+def run_step(number, step):
+    @fragment
+    def step_fragment():
+        # 단계만 다시 실행될 때는 위쪽 코드가 실행되지 않으므로 추적 태그를 여기서 다시 설정
+        set_trace_context(session=st.session_state['session_id'], page="teacher",
+                          assessment=st.session_state['settingname'], step=number)
+        with span("teacher.step"):
+            step()
+    step_fragment()
+
 # --- 탭 레이아웃 구성 ---
 
 tabs = st.tabs([
@@ -371,24 +490,24 @@ tabs = st.tabs([
 
 with tabs[0]:
     #st.info(progress_texts[0])
-    step1()
+    run_step(1, step1)
 
 with tabs[1]:
     #st.info(progress_texts[1])
-    step2()
+    run_step(2, step2)
 
 with tabs[2]:
     #st.info(progress_texts[2])
-    step3()
+    run_step(3, step3)
 
 with tabs[3]:
     #st.info(progress_texts[3])
-    step4()
+    run_step(4, step4)
 
 with tabs[4]:
     #st.info(progress_texts[4])
-    step5()
+    run_step(5, step5)
 
 with tabs[5]:
     #st.info(progress_texts[5])
-    step6()
\ No newline at end of file
+    run_step(6, step6)
\ No newline at end of file
@@ -0,0 +1,187 @@
+import contextvars
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+# --- 외부 호출 추적 ---
+# OpenAI, Google Sheets, Firebase로 나가는 호출마다 걸린 시간과 결과(폴링 횟수, 토큰 사용량 등)를 span으로 남긴다.
+# span에는 현재 세션, 페이지, 단계, 평가 코드가 함께 붙으므로 느린 세션이 어디서 시간을 쓰는지 찾을 수 있다.
+# 기본으로는 아무것도 기록하지 않는다. [tracing] path(또는 TRACING_PATH)를 주면 JSONL 파일로 남기고,
+# [tracing] otel = true(또는 TRACING_OTEL=1)이면 OpenTelemetry span으로 보낸다
+# (수집기 설정은 opentelemetry SDK 쪽에서 함).
+
+_tags = contextvars.ContextVar("trace_tags", default={})
+_current = contextvars.ContextVar("trace_span", default=None)
+
+# 이후 span에 붙일 태그 (session, page, step, assessment 등). 스크립트가 실행될 때마다 다시 설정한다.
+def set_trace_context(**tags):
+    _tags.set({**_tags.get(), **tags})
+
+class Span:
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.id if parent else None
+        self.attrs = dict(attrs)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def set_usage(self, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.set(prompt_tokens=getattr(usage, "prompt_tokens", None),
+                 completion_tokens=getattr(usage, "completion_tokens", None),
+                 total_tokens=getattr(usage, "total_tokens", None),
+                 cached_tokens=getattr(details, "cached_tokens", None) if details else None)
+
+class _NoSpan:
+    def set(self, **attrs):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+    def set_usage(self, usage):
+        pass
+
+# 지금 실행 중인 span (없으면 기록하지 않는 빈 span)
+def current_span():
+    return _current.get() or _NoSpan()
+
+class Tracer:
+    def __init__(self, path=None, otel=False):
+        self._lock = threading.Lock()
+        self._file = None
+        self.configure(path, otel)
+
+    def configure(self, path=None, otel=False):
+        with self._lock:
+            if self._file:
+                self._file.close()
+            # span마다 파일을 다시 열지 않도록 열어 둠 (줄 단위로 flush)
+            self._file = open(path, "a", encoding="utf-8", buffering=1) if path else None
+        self.path = path
+        self._otel = None
+        if otel:
+            try:
+                from opentelemetry import trace as otel_trace
+            except ImportError:
+                return
+            self._otel_trace = otel_trace
+            self._otel = otel_trace.get_tracer("2025test")
+
+    @property
+    def enabled(self):
+        return bool(self.path or self._otel)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.enabled:
+            yield _NoSpan()
+            return
+
+        span = Span(name, _current.get(), attrs)
+        token = _current.set(span)
+        start_ns = time.time_ns()
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield span
+        except BaseException as e:
+            status = "error"
+            span.set(error=f"{type(e).__name__}: {e}"[:300])
+            raise
+        finally:
+            _current.reset(token)
+            self._export(span, start_ns, time.perf_counter() - started, status)
+
+    def _export(self, span, start_ns, duration, status):
+        attrs = {k: v for k, v in span.attrs.items() if v is not None}
+        record = {
+            "time": round(start_ns / 1e9, 3), "name": span.name, "duration": round(duration, 4),
+            "status": status, "span_id": span.id, "parent_id": span.parent_id, **_tags.get(), **attrs}
+        if self.path:
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self._lock:
+                if self._file:
+                    self._file.write(line + "\n")
+        if self._otel:
+            otel_span = self._otel.start_span(span.name, start_time=start_ns)
+            for key, value in {**_tags.get(), **attrs}.items():
+                otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+            if status == "error":
+                otel_span.set_status(self._otel_trace.Status(self._otel_trace.StatusCode.ERROR, attrs.get("error")))
+            otel_span.end(end_time=start_ns + int(duration * 1e9))
+
+tracer = Tracer()
+
+def span(name, **attrs):
+    return tracer.span(name, **attrs)
+
+# [tracing] path(기본 없음), otel(기본 false). 환경 변수 TRACING_PATH, TRACING_OTEL이 있으면 그 값을 사용
+@st.cache_resource
+def init_tracing():
+    config = st.secrets.get("tracing", {})
+    path = os.environ.get("TRACING_PATH", config.get("path"))
+    otel = os.environ.get("TRACING_OTEL", str(config.get("otel", False))).lower() in ("1", "true", "yes")
+    tracer.configure(path=path or None, otel=otel)
+    return tracer
+
+# --- requests 세션(gspread, 이미지 다운로드)의 HTTP 요청 추적 ---
+# 시트 id, 범위 등은 호출마다 달라서 묶어 보기 어려우므로 endpoint에서는 지움
+def endpoint_name(path):
+    path = re.sub(r"/spreadsheets/[^/:]+", "/spreadsheets/{id}", path)
+    path = re.sub(r"/values/[^/:]+", "/values/{range}", path)
+    path = re.sub(r"/files/[^/]+", "/files/{id}", path)
+    return path
+
+class TracingAdapter(HTTPAdapter):
+    def __init__(self, service, **kwargs):
+        self.service = service
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        path = request.path_url.split("?", 1)[0]
+        with span(f"{self.service}.http", method=request.method,
+                  endpoint=endpoint_name(path) if self.service == "sheets" else None) as s:
+            response = super().send(request, **kwargs)
+            s.set(http_status=response.status_code)
+            return response
+
+# --- 기록 요약: python tracing.py traces.jsonl [묶을 필드...] ---
+# 기본은 span 이름과 단계(step)별로 횟수, 전체 시간, p50/p95, 오류 수를 전체 시간 순으로 보여준다.
+def summarize(path, keys=("name", "step")):
+    groups = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            group = groups.setdefault(tuple(record.get(k, "") for k in keys), {"durations": [], "errors": 0})
+            group["durations"].append(record["duration"])
+            group["errors"] += record["status"] == "error"
+
+    rows = []
+    for group_key, group in groups.items():
+        durations = sorted(group["durations"])
+        quantiles = statistics.quantiles(durations, n=100, method="inclusive") if len(durations) > 1 else durations * 99
+        rows.append({**dict(zip(keys, group_key)), "count": len(durations), "total": round(sum(durations), 3),
+                     "p50": round(quantiles[49], 3), "p95": round(quantiles[94], 3), "errors": group["errors"]})
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+if __name__ == "__main__":
+    for row in summarize(sys.argv[1], tuple(sys.argv[2:]) or ("name", "step")):
+        print(json.dumps(row, ensure_ascii=False))
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# 응답의 usage에서 프롬프트 캐시로 처리된 토큰 수 (Assistants run은 값이 없을 수 있음)
+def cached_tokens(usage):
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", None) or 0
+
+def _add(totals, entry):
+    totals["requests"] += 1
+    totals["prompt_tokens"] += entry["prompt_tokens"]
+    totals["cached_tokens"] += entry["cached_tokens"]
+    totals["completion_tokens"] += entry["completion_tokens"]
+    key = "hit" if entry["cached_tokens"] else "miss"
+    totals[f"{key}_requests"] += 1
+    totals[f"{key}_seconds"] += entry["duration"]
+
+def _summary(totals):
+    def average(key):
+        count = totals[f"{key}_requests"]
+        return round(totals[f"{key}_seconds"] / count, 3) if count else None
+    return {
+        "requests": totals["requests"],
+        "prompt_tokens": totals["prompt_tokens"],
+        "cached_tokens": totals["cached_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "cached_ratio": round(totals["cached_tokens"] / totals["prompt_tokens"], 3) if totals["prompt_tokens"] else 0.0,
+        "hit_rate": round(totals["hit_requests"] / totals["requests"], 3) if totals["requests"] else 0.0,
+        "avg_seconds_hit": average("hit"),
+        "avg_seconds_miss": average("miss")}
+
+def _empty_totals():
+    return {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+            "hit_requests": 0, "hit_seconds": 0.0, "miss_requests": 0, "miss_seconds": 0.0}
+
+# --- 채점 요청(run)마다 토큰 사용량과 프롬프트 캐시 적중 기록 ---
+# 프로세스 안에서는 합계를 유지하고, path를 주면 요청마다 한 줄씩 JSONL로 남겨 나중에 summarize_file로 다시 집계한다.
+# 파일이 max_bytes를 넘으면 path.1로 옮기고(이전 path.1은 지움) 새 파일에 이어서 쓴다.
+class UsageMetrics:
+    def __init__(self, path=None, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._totals = _empty_totals()
+        self._file = open(path, "a", encoding="utf-8", buffering=1) if path else None
+
+    def _write(self, line):
+        if self._file.tell() + len(line) > self.max_bytes:
+            self._file.close()
+            os.replace(self.path, self.path + ".1")
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._file.write(line)
+
+    def record(self, usage, duration, **tags):
+        entry = {
+            "time": round(time.time(), 3),
+            **tags,
+            "duration": round(duration, 3),
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "cached_tokens": cached_tokens(usage),
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0}
+        with self._lock:
+            _add(self._totals, entry)
+            if self._file:
+                self._write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def summary(self):
+        with self._lock:
+            return _summary(self._totals)
+
+def summarize_file(path, **filters):
+    totals = _empty_totals()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if all(entry.get(k) == v for k, v in filters.items()):
+                _add(totals, entry)
+    return _summary(totals)
+
+# python usagemetrics.py grading_metrics.jsonl
+if __name__ == "__main__":
+    print(json.dumps(summarize_file(sys.argv[1]), ensure_ascii=False, indent=2))
@@ -0,0 +1,45 @@
+import time
+
+# --- 벡터스토어 파일 목록 (페이지를 끝까지 넘기면서 모두 가져오기) ---
+def list_file_ids(client, vector_store_id):
+    files = client.beta.vector_stores.files.list(vector_store_id=vector_store_id, limit=100)
+    return [file.id for file in files]
+
+# --- 벡터스토어 파일 복사 ---
+# 파일을 하나씩 추가하지 않고 file_batches로 한 번에(최대 batch_size개씩) 추가한다.
+# on_progress(완료된 파일 수, 전체 파일 수)로 진행 상황을 알려주고 (전체, 실패) 개수를 반환한다.
+def copy_vector_store_files(client, source_id, target_id, on_progress=None,
+                            batch_size=500, timeout=600):
+    file_ids = list_file_ids(client, source_id)
+    total = len(file_ids)
+    done = 0
+    failed = 0
+    deadline = time.monotonic() + timeout
+    if on_progress:
+        on_progress(0, total)
+
+    for start in range(0, total, batch_size):
+        chunk = file_ids[start:start + batch_size]
+        batch = client.beta.vector_stores.file_batches.create(
+            vector_store_id=target_id, file_ids=chunk)
+
+        delay = 0.5
+        while batch.status == "in_progress":
+            if on_progress:
+                counts = batch.file_counts
+                on_progress(done + counts.completed + counts.failed, total)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{timeout}초 안에 파일 복사가 끝나지 않았습니다.")
+            time.sleep(delay)
+            delay = min(3.0, delay * 1.5)
+            batch = client.beta.vector_stores.file_batches.retrieve(
+                batch.id, vector_store_id=target_id)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"파일 복사가 중단되었습니다. ({batch.status})")
+        done += len(chunk)
+        failed += batch.file_counts.failed
+        if on_progress:
+            on_progress(done, total)
+
+    return total, failed